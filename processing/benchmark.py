@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import random
+import argparse
+
+from processing import connectFour as engine
+from processing.boardConfig import DEFAULT_ROWS, DEFAULT_COLS
+
+# --------------------------------------------------
+# Test positions
+# --------------------------------------------------
+# Moves are 1-based columns on the standard 6x7 board. The sides alternate so that
+# the computer is to move after the last one. Score is the exact solver score for the computer (None when
+# unknown) and best the 0-based columns that reach it (None when unknown).
+POSITION_SETS = {
+    "opening": [
+        ("", 1, (3,)),
+        ("4", None, None),
+        ("44", None, None),
+        ("4453", None, None),
+        ("444343", None, None),
+    ],
+    "tactical": [
+        ("17273", None, (3,)),
+        ("17161", None, (0,)),
+        ("515541235723425", 13, (2,)),
+        ("654734543321672", 13, (1, 4)),
+        ("153542643551542", 13, (2,)),
+    ],
+    "middle_hard": [
+        ("2552354151743427", 0, (0, 2, 3)),
+        ("4575446722627556", -1, (0, 2, 3)),
+        ("1671275134773456", 3, (2, 3)),
+        ("4674467542311244", 9, (6,)),
+        ("3647673452535552", 0, (1, 5)),
+    ],
+    "middle_easy": [
+        ("53637474776121244455", -6, (1, 2)),
+        ("52162432774277136562", -9, (1,)),
+        ("21712722723326773373", 2, (0, 3, 4)),
+        ("43134223333661677414", 2, (5,)),
+        ("647675354551776435445221", -1, (1,)),
+        ("624536517736172415445266", 0, (0,)),
+        ("752732721467113322711123", 2, (4,)),
+        ("566613341345354551673115", 4, (5,)),
+    ],
+    "endgame_hard": [
+        ("5655334232642255742447267571", -2, (0,)),
+        ("5443674126634467211513333776", 6, (4, 6)),
+        ("5464426443133625476337522565", 3, (4,)),
+        ("3266253216616116447171777233", -2, (1,)),
+        ("44113234723336622712144436777672", -4, (5,)),
+        ("67654256146573664173221411334477", 1, (2,)),
+    ],
+    "endgame_easy": [
+        ("21571572542777765514233446221154", -2, (3,)),
+        ("61122252345573434332234447576551", 0, (0,)),
+        ("422337711446355646626214233247763711", 2, (4,)),
+        ("733272776145753754554223533121144241", 2, (0,)),
+        ("752335114353662573326124471751662215", 0, (5, 6)),
+        ("762317273672245314571122435575544134", -2, (0, 2)),
+    ],
+}
+
+# Board sizes as cols x rows, and the plies played before each scaling position
+BOARD_SIZES = ["7x6", "8x7", "9x7"]
+SCALING_PLIES = (0, 4, 8, 12, 16)
+SCALING_DEPTH = 8
+SOLVE_TIMEOUT_MS = 30000  # Limit per position in solve mode without --time-budget-ms, the empty board takes far longer
+
+BENCHMARK_DIR = os.path.join(engine.BASE_DIR, "data", "benchmarks")
+
+
+def position_from_moves(moves, rows=DEFAULT_ROWS, cols=DEFAULT_COLS):
+    position = engine.create_board(rows, cols)
+    piece = engine.PLAYER if len(moves) % 2 else engine.COMPUTER
+    for move in moves:
+        position.play(int(move) - 1, piece)
+        piece = engine.PLAYER + engine.COMPUTER - piece
+    return position  # Computer to move
+
+
+# --------------------------------------------------
+# Running
+# --------------------------------------------------
+def run_position(moves, expected_score, expected_best, mode, depth, time_budget_ms, solver_empty_cells):
+    position = position_from_moves(moves)
+    context = engine.SearchContext(engine.TranspositionTable())
+    engine.solver_table.clear()  # Every position starts cold
+    start = time.perf_counter()
+    timed_out = False
+    if mode == "solve":
+        deadline = start + (time_budget_ms or SOLVE_TIMEOUT_MS) / 1000
+        try:
+            score, col = engine.solve(position, engine.COMPUTER, deadline, context=context)
+        except engine.SearchTimeout:
+            score, col, timed_out = None, None, True
+    elif mode == "mcts":
+        score, col = engine.mcts_search(position, time_budget_ms, stats=context.stats, seed=0)
+    else:
+        score, col = engine.search(position, depth, time_budget_ms, solver_empty_cells=solver_empty_cells,
+                                   context=context)
+    elapsed = time.perf_counter() - start
+    result = {
+        "moves": moves,
+        "col": col,
+        "score": score,
+        "nodes": context.stats.nodes,
+        "time_ms": round(elapsed * 1000, 3),
+        "nodes_per_sec": round(context.stats.nodes / elapsed) if elapsed > 0 else None,
+        "playouts_per_sec": round(context.stats.playouts / elapsed) if elapsed > 0 else None,
+        "correct": None,
+        "timed_out": timed_out,
+        "stats": context.stats.as_dict(),
+    }
+    if timed_out:
+        return result  # Not counted as correct or wrong
+    if expected_best is not None:
+        result["correct"] = col in expected_best
+    if mode == "solve" and expected_score is not None:
+        result["correct"] = result["correct"] is not False and score == expected_score
+    return result
+
+
+def parse_size(text):
+    cols, rows = (int(value) for value in text.lower().split("x"))
+    return engine.check_board_size(rows, cols)  # (rows, cols) from "COLSxROWS"
+
+
+def scaling_positions(rows, cols, plies=SCALING_PLIES, seed=0):
+    rng = random.Random(seed)
+    positions = []
+    for count in plies:
+        while True:  # Replay until a game reaches count plies without a win
+            position = engine.create_board(rows, cols)
+            piece = engine.PLAYER if count % 2 else engine.COMPUTER
+            for _ in range(count):
+                position.play(rng.choice([col for col in range(cols) if engine.is_valid_location(position, col)]), piece)
+                if engine.check_win(position, piece):
+                    break
+                piece = engine.PLAYER + engine.COMPUTER - piece
+            else:
+                positions.append((count, position))
+                break
+    return positions  # (plies, position) pairs with the computer to move, the same for every run
+
+
+def run_scaling(sizes, depth=None, time_budget_ms=None):
+    if depth is None and time_budget_ms is None:
+        depth = SCALING_DEPTH
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"mode": "scaling", "depth": depth, "time_budget_ms": time_budget_ms},
+        "sizes": {},
+    }
+    for size in sizes:
+        rows, cols = parse_size(size)
+        results = []
+        for plies, position in scaling_positions(rows, cols):
+            context = engine.SearchContext(engine.TranspositionTable())
+            engine.solver_table.clear()
+            start = time.perf_counter()
+            score, col = engine.search(position, depth, time_budget_ms, solver_empty_cells=0, context=context)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "plies": plies,
+                "col": col,
+                "score": score,
+                "depth": context.stats.depth,
+                "nodes": context.stats.nodes,
+                "time_ms": round(elapsed * 1000, 3),
+                "correct": None,
+            })
+        summary = summarize(results)
+        summary["mean_depth"] = round(sum(result["depth"] or 0 for result in results) / len(results), 2)
+        report["sizes"][size] = {"summary": summary, "positions": results}
+    return report
+
+
+def summarize(results):
+    total_time = sum(result["time_ms"] for result in results)
+    total_nodes = sum(result["nodes"] for result in results)
+    checked = [result["correct"] for result in results if result["correct"] is not None]
+    return {
+        "positions": len(results),
+        "nodes": total_nodes,
+        "time_ms": round(total_time, 3),
+        "mean_time_ms": round(total_time / len(results), 3) if results else 0,
+        "nodes_per_sec": round(total_nodes / (total_time / 1000)) if total_time else None,
+        "correct": sum(checked),
+        "checked": len(checked),
+        "timeouts": sum(result.get("timed_out", False) for result in results),
+    }
+
+
+def run_benchmark(sets, mode="search", depth=None, time_budget_ms=None, solver_empty_cells=None):
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {
+            "mode": mode,
+            "depth": depth,
+            "time_budget_ms": time_budget_ms,
+            "solver_empty_cells": solver_empty_cells,
+        },
+        "sets": {},
+    }
+    for name in sets:
+        results = [
+            run_position(moves, score, best, mode, depth, time_budget_ms, solver_empty_cells)
+            for moves, score, best in POSITION_SETS[name]
+            if mode != "solve" or score is not None  # Unsolved positions are too slow to solve here
+        ]
+        if not results:
+            continue
+        report["sets"][name] = {"summary": summarize(results), "positions": results}
+    return report
+
+
+# --------------------------------------------------
+# Reporting
+# --------------------------------------------------
+def print_report(report, baseline=None):
+    print(f"Benchmark {report['timestamp']}  {report['settings']}")
+    print(f"  {'set':<14}{'positions':>10}{'nodes':>12}{'time ms':>12}{'nodes/s':>12}{'correct':>10}")
+    for name, data in report["sets"].items():
+        summary = data["summary"]
+        line = (f"  {name:<14}{summary['positions']:>10}{summary['nodes']:>12}{summary['time_ms']:>12.1f}"
+                f"{summary['nodes_per_sec'] or 0:>12}{summary['correct']:>5}/{summary['checked']:<4}")
+        if summary.get("timeouts"):
+            line += f"  {summary['timeouts']} timed out"
+        if baseline is not None and name in baseline["sets"]:
+            before = baseline["sets"][name]["summary"]
+            if before["time_ms"]:
+                line += f"  time {100 * (summary['time_ms'] / before['time_ms'] - 1):+.1f}%"
+            if before["nodes"]:
+                line += f"  nodes {100 * (summary['nodes'] / before['nodes'] - 1):+.1f}%"
+        print(line)
+
+
+def print_scaling_report(report):
+    print(f"Board size scaling {report['timestamp']}  {report['settings']}")
+    print(f"  {'size':<8}{'positions':>10}{'nodes':>12}{'time ms':>12}{'nodes/s':>12}{'depth':>8}")
+    base = None
+    for size, data in report["sizes"].items():
+        summary = data["summary"]
+        line = (f"  {size:<8}{summary['positions']:>10}{summary['nodes']:>12}{summary['time_ms']:>12.1f}"
+                f"{summary['nodes_per_sec'] or 0:>12}{summary['mean_depth']:>8}")
+        if base is None:
+            base = summary
+        elif base["time_ms"] and base["nodes"]:
+            line += (f"  time x{summary['time_ms'] / base['time_ms']:.2f}"
+                     f"  nodes x{summary['nodes'] / base['nodes']:.2f}")
+        print(line)
+
+
+def save_report(report, path=None):
+    if path is None:
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        path = os.path.join(BENCHMARK_DIR, f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to '{path}'")
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Connect Four engine benchmark")
+    parser.add_argument('--sets', nargs='+', default=list(POSITION_SETS), choices=list(POSITION_SETS),
+                        help="Position sets to run (default: all).")
+    parser.add_argument('--mode', default="search", choices=["search", "solve", "mcts"],
+                        help="search: alpha-beta search, solve: exact solver, mcts: Monte Carlo tree search "
+                             "(default: search).")
+    parser.add_argument('--depth', default=None, type=int,
+                        help="Fixed search depth (default: engine default).")
+    parser.add_argument('--time-budget-ms', default=None, type=int,
+                        help="Time budget per position instead of a fixed depth; in solve mode the limit "
+                             f"after which a position counts as timed out (default: {SOLVE_TIMEOUT_MS}).")
+    parser.add_argument('--solver-empty-cells', default=None, type=int,
+                        help="Empty cells at which search switches to the solver (default: engine default).")
+    parser.add_argument('--output', default=None,
+                        help="JSON results file (default: data/benchmarks/benchmark_<time>.json).")
+    parser.add_argument('--compare', default=None,
+                        help="Earlier JSON results to compare against.")
+    parser.add_argument('--sizes', nargs='+', default=None, metavar='COLSxROWS',
+                        help=f"Measure search cost per board size instead, e.g. {' '.join(BOARD_SIZES)}.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.sizes:
+        report = run_scaling(args.sizes, args.depth, args.time_budget_ms)
+        print_scaling_report(report)
+        save_report(report, args.output)
+        raise SystemExit(0)
+    report = run_benchmark(args.sets, args.mode, args.depth, args.time_budget_ms, args.solver_empty_cells)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    save_report(report, args.output)
@@ -0,0 +1,38 @@
+import os
+import yaml
+
+# --------------------------------------------------
+# Board size
+# --------------------------------------------------
+# config.yaml holds the board size next to the crop points:
+#
+#   board:
+#     rows: 6
+#     cols: 7
+#
+# Without a board section the standard 6x7 board is used.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+
+DEFAULT_ROWS = 6
+DEFAULT_COLS = 7
+MIN_SIZE = 4  # Four in a row has to fit in both directions
+MAX_SIZE = 16  # Largest rows and cols the shared-memory state records hold
+
+
+def check_board_size(rows, cols):
+    if not isinstance(rows, int) or not isinstance(cols, int) or \
+            not MIN_SIZE <= rows <= MAX_SIZE or not MIN_SIZE <= cols <= MAX_SIZE:
+        raise ValueError(f"Invalid board size {rows}x{cols}, rows and cols must be integers "
+                         f"from {MIN_SIZE} to {MAX_SIZE}")
+    return rows, cols
+
+
+def load_board_size(path=CONFIG_PATH):
+    try:
+        with open(path, "r") as f:
+            data = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return DEFAULT_ROWS, DEFAULT_COLS
+    board = data.get("board") or {}
+    return check_board_size(board.get("rows", DEFAULT_ROWS), board.get("cols", DEFAULT_COLS))  # (rows, cols)
@@ -14,6 +14,8 @@ TARGET_FPS = 30
 
 FRAME_BYTES = FRAME_WIDTH * FRAME_HEIGHT * CHANNELS
 GAMMA = 1.4  # Adjustable light 1.2-1.6
+RING_SLOTS = 4  # Frames kept in shared memory, readers may lag up to RING_SLOTS - 1 frames
+READ_RETRIES = 100
 
 # --------------------------------------------------
 # Logging
@@ -31,6 +33,92 @@ GAMMA_LUT = np.array(
     dtype=np.uint8
 )
 
+# --------------------------------------------------
+# Frame ring
+# --------------------------------------------------
+# The camera writes frame n into slot n % RING_SLOTS, never into the slot of
+# the latest complete frame. Each slot has a sequence counter that is odd while
+# the slot is written (seqlock): a reader uses the slot in place and keeps its
+# result only if the counter did not change meanwhile.
+RING_HEADER_DTYPE = np.dtype([
+    ("frame_count", "<u8"),  # Number of the latest complete frame, 0 before the first
+    ("latest", "<u8"),  # Slot of the latest complete frame
+    ("slot_seq", "<u8", (RING_SLOTS,)),
+    ("slot_frame", "<u8", (RING_SLOTS,)),  # Frame number held by each slot
+], align=True)
+RING_HEADER_BYTES = 64 * -(-RING_HEADER_DTYPE.itemsize // 64)  # Frames start cache-line aligned
+
+
+class FrameRing:
+    def __init__(self, name=None, create=False):
+        size = RING_HEADER_BYTES + RING_SLOTS * FRAME_BYTES
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self.shm.name
+        self.header = np.ndarray((), RING_HEADER_DTYPE, buffer=self.shm.buf)
+        self.slots = np.ndarray(
+            (RING_SLOTS, FRAME_HEIGHT, FRAME_WIDTH, CHANNELS),
+            dtype=np.uint8,
+            buffer=self.shm.buf,
+            offset=RING_HEADER_BYTES
+        )
+        if create:
+            self.header[()] = np.zeros((), RING_HEADER_DTYPE)
+
+    @property
+    def frame_count(self):
+        return int(self.header["frame_count"])
+
+    def write(self, frame):
+        # Only the camera process writes
+        header = self.header
+        frame_number = int(header["frame_count"]) + 1
+        slot = frame_number % RING_SLOTS
+        header["slot_seq"][slot] += 1  # Odd: readers of this slot retry
+        self.slots[slot] = frame
+        header["slot_frame"][slot] = frame_number
+        header["slot_seq"][slot] += 1
+        header["latest"] = slot
+        header["frame_count"] = frame_number
+
+    def _read_slot(self, slot, transform):
+        seq = self.header["slot_seq"]
+        before = int(seq[slot])
+        if before & 1:
+            return None
+        frame_number = int(self.header["slot_frame"][slot])
+        result = transform(self.slots[slot])
+        if int(seq[slot]) != before:
+            return None  # The camera overwrote the slot while it was read
+        return frame_number, result
+
+    def read_latest(self, transform=np.copy, newer_than=0):
+        """Return (frame number, transform(frame)) of the latest frame, None if there is none newer than newer_than."""
+        for _ in range(READ_RETRIES):
+            if int(self.header["frame_count"]) <= newer_than:
+                return None
+            result = self._read_slot(int(self.header["latest"]), transform)
+            if result is not None:
+                return result
+        logging.warning("Frame ring is written too fast to read")
+        return None
+
+    def read_since(self, frame_number, transform=np.copy):
+        """Return the frames after frame_number still in the ring, oldest first."""
+        frames = []
+        for number in range(max(frame_number + 1, self.frame_count - RING_SLOTS + 2), self.frame_count + 1):
+            slot = number % RING_SLOTS
+            result = self._read_slot(slot, transform)
+            if result is not None and result[0] == number:
+                frames.append(result)
+        return frames
+
+    def close(self, unlink=False):
+        del self.header, self.slots  # Release the buffer exports before closing the block
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
 # --------------------------------------------------
 # Camera open helper
 # --------------------------------------------------
@@ -48,20 +136,14 @@ def open_camera_fast(indices=(1, 2)):
 # Camera process entry point
 # --------------------------------------------------
 def main(pipe=None):
-    shm = None
+    ring = None
     cap = None
 
     try:
         # --------------------------------------------------
         # Shared memory
         # --------------------------------------------------
-        shm = shared_memory.SharedMemory(create=True, size=FRAME_BYTES)
-        frame_buffer = np.ndarray(
-            (FRAME_HEIGHT, FRAME_WIDTH, CHANNELS),
-            dtype=np.uint8,
-            buffer=shm.buf
-        )
-        frame_buffer[:] = 0
+        ring = FrameRing(create=True)
 
         # --------------------------------------------------
         # Camera open (defaults)
@@ -87,7 +169,7 @@ def main(pipe=None):
         # Notify UI AFTER camera is ready
         # --------------------------------------------------
         if pipe:
-            pipe.send(shm.name)
+            pipe.send(ring.name)
 
         logging.info("Camera ready, entering capture loop")
 
@@ -109,8 +191,8 @@ def main(pipe=None):
             # Gamma correction (fix dark image)
             frame = cv2.LUT(frame, GAMMA_LUT)
 
-            # Write directly to shared memory
-            frame_buffer[:] = frame
+            # Write into the next ring slot, readers keep using the latest one
+            ring.write(frame)
 
             # Frame pacing
             next_frame_time += frame_interval
@@ -127,6 +209,5 @@ def main(pipe=None):
         logging.info("Shutting down camera process")
         if cap:
             cap.release()
-        if shm:
-            shm.close()
-            shm.unlink()
+        if ring:
+            ring.close(unlink=True)
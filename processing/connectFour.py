@@ -1,124 +1,1304 @@
 import xml.etree.ElementTree as ET
 import numpy as np
-import random
 import time
 import math
 import os
+import functools
+import argparse
+import ast
+import json
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from processing.openingBook import OpeningBook
+from processing.searchCache import SearchCache
+from processing.boardConfig import load_board_size, check_board_size
+from processing.stateChannel import StateChannel, GAME_CHANNEL, GAME_DTYPE, game_state_fields
+from processing.fileWatch import atomic_path
+from processing.moveLog import MoveLog, RESULTS
 
-ROW_COUNT = 6
-COLUMN_COUNT = 7
+ROW_COUNT, COLUMN_COUNT = load_board_size()  # Board size of play_game, from config.yaml
 EMPTY = 0
 PLAYER = 1  
 COMPUTER = 2  
 XML_FILE = 'game_status.xml'
+XML_EXPORT = False  # Also write every state change to XML_FILE, the state channel is the primary interface
+COMMAND_TIMEOUT_S = 1.0  # Longest wait for a player command, keeps the loop interruptible
+MOVE_LOG = True  # Append every move of play_game to the binary move log in data/games
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OPENING_BOOK_PATH = os.path.join(BASE_DIR, "data", "opening_book.bin")
+SEARCH_CACHE_PATH = os.path.join(BASE_DIR, "data", "search_cache.sqlite3")
+USE_SEARCH_CACHE = True  # Share search results across games and processes through SEARCH_CACHE_PATH
+CACHE_MIN_TIMED_DEPTH = 8  # Shallowest cached search that may answer a time-budgeted move
+SEARCH_DEPTH = 4  # Fixed depth used when no time budget is given
+THINK_TIME_MS = 1500  # Time budget per computer move in play_game
+TIMEOUT_CHECK_NODES = 255  # Check the clock every 256 nodes
+TT_MAX_MB = 64  # Memory cap of the transposition table
+TT_ENTRY_BYTES = 160  # Approximate CPython size of one stored entry
+SEARCH_WORKERS = 1  # Processes used by get_computer_move, more than 1 splits the root columns
+WRITE_ENGINE_STATS = False  # Add the stats of each computer move to the game status XML
+PONDER = True  # Search the likely replies while the player is thinking
+PONDER_MIN_DEPTH = 8  # Pondered moves at least this deep are played without a new search
+SOLVER_EMPTY_CELLS = 18  # search() solves positions exactly from this many empty cells down
+WIN_SCORE = 1000000  # Score of a won position, minus the plies needed to win
+MAX_WIN_PLIES = 1000  # Scores within this distance of WIN_SCORE are wins
+WIN_PROBABILITY_SCALE = 25  # Heuristic score at which win_probability gives about 73%
+WORKER_TT_MAX_MB = 16  # Table size of each root move search in a worker process
+ENGINES = ("alphabeta", "mcts")  # Search engines of get_computer_move
+MCTS_BATCH_SIZE = 256  # Playouts simulated together, in one set of array operations, from every new leaf
+MCTS_EXPLORATION = 1.4  # UCB1 exploration constant
+MCTS_ITERATIONS = 400  # Tree iterations when no time budget is given
 
-def create_board():
-    return np.zeros((ROW_COUNT, COLUMN_COUNT), int)  # Initialize empty game board
+# --------------------------------------------------
+# Bitboard position
+# --------------------------------------------------
+# Every column uses rows + 1 bits, the extra bit on top is a sentinel that keeps
+# shifted patterns from wrapping into the next column. The cell (row, col), with
+# row 0 at the bottom, is bit ``col * (rows + 1) + row``.
+
+class BoardLayout:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.stride = rows + 1
+        self.bottom_mask = sum(1 << (col * self.stride) for col in range(cols))
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+        self.column_masks = [((1 << rows) - 1) << (col * self.stride) for col in range(cols)]
+        self.center_order = sorted(range(cols), key=lambda col: abs(2 * col - (cols - 1)))
+        self.windows = self._build_windows()
+        self.cell_windows = [
+            [window for window in self.windows if window >> cell & 1]
+            for cell in range(cols * self.stride)
+        ]  # Windows through each cell, indexed by bit number
+        self.window_index = self._build_window_index()
+
+    def bit(self, row, col):
+        return 1 << (col * self.stride + row)
+
+    def _build_windows(self):
+        windows = []
+        for row in range(self.rows):
+            for col in range(self.cols):
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+                    end_row = row + 3 * d_row
+                    end_col = col + 3 * d_col
+                    if 0 <= end_row < self.rows and end_col < self.cols:
+                        windows.append(sum(self.bit(row + i * d_row, col + i * d_col) for i in range(4)))
+        return windows  # Bit masks of all four-cell windows
+
+    def _build_window_index(self):
+        index = np.zeros((len(self.windows), 4), dtype=np.intp)
+        for i, window in enumerate(self.windows):
+            cells = [cell for cell in range(self.cols * self.stride) if window >> cell & 1]
+            index[i] = [(cell % self.stride) * self.cols + cell // self.stride for cell in cells]
+        return index  # (windows, 4) indices into the flattened row-major board
+
+@functools.lru_cache(maxsize=None)
+def get_layout(rows=ROW_COUNT, cols=COLUMN_COUNT):
+    return BoardLayout(rows, cols)  # Shared precomputed masks per board size
+
+def has_four(stones, stride):
+    for shift in (1, stride, stride - 1, stride + 1):  # vertical, horizontal, both diagonals
+        pairs = stones & (stones >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False  # Shift-and-mask win detection
+
+class Position:
+    __slots__ = ("layout", "evaluation", "stones", "heights", "moves", "score", "score_stack")
+
+    def __init__(self, rows=ROW_COUNT, cols=COLUMN_COUNT, evaluation=None):
+        self.layout = get_layout(rows, cols)
+        self.evaluation = evaluation or DEFAULT_EVALUATION  # Window score tables behind score
+        self.stones = [0, 0, 0]  # Indexed by piece, stones[EMPTY] stays 0
+        self.heights = [0] * cols
+        self.moves = 0
+        self.score = 0  # evaluate_board of this position, kept up to date by play/undo
+        self.score_stack = []
+
+    def __getstate__(self):
+        weights = None if self.evaluation is DEFAULT_EVALUATION else self.evaluation.key
+        return self.layout.rows, self.layout.cols, weights, self.stones, self.heights, self.moves, self.score
+
+    def __setstate__(self, state):
+        rows, cols, weights, self.stones, self.heights, self.moves, self.score = state
+        self.layout = get_layout(rows, cols)
+        self.evaluation = DEFAULT_EVALUATION if weights is None else _get_evaluation(weights)
+        self.score_stack = []  # Pickled without the shared layout tables, e.g. for worker processes
+
+    @property
+    def rows(self):
+        return self.layout.rows
+
+    @property
+    def cols(self):
+        return self.layout.cols
+
+    @property
+    def occupied(self):
+        return self.stones[PLAYER] | self.stones[COMPUTER]
+
+    def copy(self):
+        position = Position.__new__(Position)
+        position.layout = self.layout
+        position.evaluation = self.evaluation
+        position.stones = self.stones[:]
+        position.heights = self.heights[:]
+        position.moves = self.moves
+        position.score = self.score
+        position.score_stack = self.score_stack[:]
+        return position
+
+    def key(self):
+        # Player stones plus occupied cells plus one bit above each column top is unique per position
+        return self.stones[PLAYER] + self.occupied + self.layout.bottom_mask
+
+    def mirrored(self):
+        layout = self.layout
+        position = Position(layout.rows, layout.cols, self.evaluation)
+        column = (1 << layout.stride) - 1
+        for col in range(layout.cols):
+            source = col * layout.stride
+            target = (layout.cols - 1 - col) * layout.stride
+            for piece in (PLAYER, COMPUTER):
+                position.stones[piece] |= (self.stones[piece] >> source & column) << target
+        position.heights = self.heights[::-1]
+        position.moves = self.moves
+        position.score = self.score  # The window set is symmetric, so is the score
+        return position  # Left-right mirror image, without undo history
+
+    def can_play(self, col):
+        return self.heights[col] < self.layout.rows
+
+    def play(self, col, piece):
+        cell = col * self.layout.stride + self.heights[col]
+        self.score_stack.append(self.score)
+        self.score += self.window_delta(cell, piece)
+        self.stones[piece] |= 1 << cell
+        self.heights[col] += 1
+        self.moves += 1
+
+    def undo(self, col):
+        self.heights[col] -= 1
+        bit = self.layout.bit(self.heights[col], col)
+        self.stones[PLAYER] &= ~bit
+        self.stones[COMPUTER] &= ~bit
+        self.moves -= 1
+        self.score = self.score_stack.pop()  # Take back the last piece played in col
+
+    def window_delta(self, cell, piece):
+        computer = self.stones[COMPUTER]
+        player = self.stones[PLAYER]
+        gains = self.evaluation.gains[piece]
+        delta = 0
+        for window in self.layout.cell_windows[cell]:
+            delta += gains[(computer & window).bit_count()][(player & window).bit_count()]
+        return delta  # Score change of placing piece on the empty cell, touching windows only
+
+    def is_full(self):
+        return self.moves == self.layout.rows * self.layout.cols
+
+    def cell(self, row, col):
+        bit = self.layout.bit(row, col)
+        if self.stones[PLAYER] & bit:
+            return PLAYER
+        if self.stones[COMPUTER] & bit:
+            return COMPUTER
+        return EMPTY
+
+    def tolist(self):
+        return [[self.cell(row, col) for col in range(self.cols)] for row in range(self.rows)]
+
+    def to_array(self):
+        cells = self.layout.cols * self.layout.stride
+        board = np.zeros(cells, dtype=int)
+        for piece in (PLAYER, COMPUTER):
+            bits = np.array([self.stones[piece] >> cell & 1 for cell in range(cells)], dtype=bool)
+            board[bits] = piece
+        return board.reshape(self.layout.cols, self.layout.stride)[:, :self.layout.rows].T.copy()
+
+    @classmethod
+    def from_array(cls, board):
+        board = np.asarray(board, dtype=int)
+        rows, cols = board.shape
+        position = cls(rows, cols)
+        for col in range(cols):
+            for row in range(rows):
+                if board[row][col] != EMPTY:
+                    drop_piece(position, row, col, int(board[row][col]))
+        return position  # Build a position from the row-0-at-bottom array format
+
+def to_position(board):
+    if isinstance(board, Position):
+        return board
+    return Position.from_array(board)  # Accept legacy list/array boards
+
+def create_board(rows=ROW_COUNT, cols=COLUMN_COUNT, evaluation=None):
+    return Position(rows, cols, evaluation)  # Initialize empty game board
 
 def is_valid_location(board, col):
-    return board[ROW_COUNT-1][col] == 0  # Check if column is not full
+    return board.heights[col] < board.layout.rows  # Check if column is not full
 
 def get_next_available_row(board, col):
-    for row in range(ROW_COUNT):
-        if board[row][col] == 0:
-            return row  # Find available row for move
+    if is_valid_location(board, col):
+        return board.heights[col]  # Find available row for move
 
 def drop_piece(board, row, col, piece):
-    board[row][col] = piece  # Drop piece on board
+    cell = col * board.layout.stride + row
+    board.score += board.window_delta(cell, piece)
+    board.stones[piece] |= 1 << cell
+    board.heights[col] = max(board.heights[col], row + 1)
+    board.moves += 1  # Drop piece on board
 
 def check_win(board, piece):
-    # Check all win conditions: horizontal, vertical, diagonal
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT):
-            if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3] == piece:
-                return True
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT-3):
-            if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c] == piece:
-                return True
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT-3):
-            if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3] == piece:
-                return True
-    for c in range(COLUMN_COUNT-3):
-        for r in range(3, ROW_COUNT):
-            if board[r][c] == piece and board[r-1][c+1] == piece and board[r-2][c+2] == piece and board[r-3][c+3] == piece:
-                return True
-    return False  # Check for winning sequence
+    return has_four(board.stones[piece], board.layout.stride)  # Check for winning sequence
 
 def evaluate_board(board):
+    if not isinstance(board, Position):
+        return int(evaluate_boards(board))
+    computer = board.stones[COMPUTER]
+    player = board.stones[PLAYER]
+    scores = board.evaluation.scores
     score = 0
-    for r in range(ROW_COUNT):
-        for c in range(COLUMN_COUNT):
-            if c + 3 < COLUMN_COUNT:
-                window = [board[r][c+i] for i in range(4)]
-                score += evaluate_window(window)
-            if r + 3 < ROW_COUNT:
-                window = [board[r+i][c] for i in range(4)]
-                score += evaluate_window(window)
-            if r + 3 < ROW_COUNT and c + 3 < COLUMN_COUNT:
-                window = [board[r+i][c+i] for i in range(4)]
-                score += evaluate_window(window)
-            if r - 3 >= 0 and c + 3 < COLUMN_COUNT:
-                window = [board[r-i][c+i] for i in range(4)]
-                score += evaluate_window(window)
+    for window in board.layout.windows:
+        score += scores[(computer & window).bit_count()][(player & window).bit_count()]
     return score  # Evaluate board state for AI
 
-def evaluate_window(window):
+# Terms of evaluate_window, engines with other weights get their own Evaluation
+EVAL_WEIGHTS = {"four": 100, "three": 5, "two": 2, "opponent_three": -4, "opponent_two": -2}
+
+def evaluate_window(window, weights=EVAL_WEIGHTS):
     score = 0
     opponent = PLAYER if COMPUTER == 2 else COMPUTER
     if window.count(COMPUTER) == 4:
-        score += 100
+        score += weights["four"]
     elif window.count(COMPUTER) == 3 and window.count(EMPTY) == 1:
-        score += 5
+        score += weights["three"]
     elif window.count(COMPUTER) == 2 and window.count(EMPTY) == 2:
-        score += 2
+        score += weights["two"]
     if window.count(PLAYER) == 3 and window.count(EMPTY) == 1:
-        score -= 4
+        score += weights["opponent_three"]
     if window.count(PLAYER) == 2 and window.count(EMPTY) == 2:
-        score -= 2
+        score += weights["opponent_two"]
     return score  # Evaluate score of four-cell window
 
-def minimax(board, depth, alpha, beta, maximizing_player):
-    valid_locations = [col for col in range(COLUMN_COUNT) if is_valid_location(board, col)]
-    if depth == 0 or len(valid_locations) == 0:
-        return evaluate_board(board), None
+class Evaluation:
+    def __init__(self, weights):
+        self.weights = dict(weights)
+        self.key = tuple(sorted(self.weights.items()))
+        # Window scores indexed by [computer pieces][player pieces], so evaluate_board only counts bits
+        self.scores = [
+            [evaluate_window([COMPUTER] * c + [PLAYER] * p + [EMPTY] * (4 - c - p), self.weights) if c + p <= 4 else 0
+             for p in range(5)]
+            for c in range(5)
+        ]
+        # Score change of a window when one more piece of the given side is added
+        self.gains = {
+            COMPUTER: [[self.scores[c + 1][p] - self.scores[c][p] if c + p < 4 else 0 for p in range(5)] for c in range(5)],
+            PLAYER: [[self.scores[c][p + 1] - self.scores[c][p] if c + p < 4 else 0 for p in range(5)] for c in range(5)],
+        }
+
+@functools.lru_cache(maxsize=None)
+def _get_evaluation(key):
+    return Evaluation(dict(key))
+
+def get_evaluation(weights=None):
+    weights = {**EVAL_WEIGHTS, **(weights or {})}
+    unknown = set(weights) - set(EVAL_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown evaluation weights: {', '.join(sorted(unknown))}")
+    return _get_evaluation(tuple(sorted(weights.items())))  # Shared tables per set of weights
+
+DEFAULT_EVALUATION = get_evaluation()
+WINDOW_SCORES = DEFAULT_EVALUATION.scores
+WINDOW_SCORE_ARRAY = np.array(WINDOW_SCORES, dtype=int)
+
+def evaluate_windows(windows):
+    windows = np.asarray(windows)
+    computer = np.count_nonzero(windows == COMPUTER, axis=-1)
+    player = np.count_nonzero(windows == PLAYER, axis=-1)
+    return WINDOW_SCORE_ARRAY[computer, player]  # Vectorized evaluate_window over the last axis
+
+def evaluate_boards(boards):
+    boards = np.asarray(boards)
+    *batch, rows, cols = boards.shape
+    flat = boards.reshape(*batch, rows * cols)
+    windows = flat[..., get_layout(rows, cols).window_index]
+    return evaluate_windows(windows).sum(axis=-1)  # Scores of one (rows, cols) board or a (N, rows, cols) stack
+
+def evaluate_children(board, piece):
+    position = to_position(board)
+    cols = [col for col in range(position.cols) if is_valid_location(position, col)]
+    children = np.repeat(position.to_array()[np.newaxis], len(cols), axis=0)
+    children[np.arange(len(cols)), [position.heights[col] for col in cols], cols] = piece
+    return dict(zip(cols, evaluate_boards(children).tolist()))  # Score every child of a node in one call
+
+WINDOW_GAINS = DEFAULT_EVALUATION.gains
+
+# --------------------------------------------------
+# Transposition table
+# --------------------------------------------------
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+class TranspositionTable:
+    def __init__(self, max_mb=TT_MAX_MB):
+        self.size = max(1, int(max_mb * 1024 * 1024) // TT_ENTRY_BYTES)
+        self.clear()
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        self.generation += 1  # Entries of earlier searches become replaceable
+
+    def lookup(self, key):
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, flag, score, best_col):
+        index = key % self.size
+        entry = self.slots[index]
+        # Keep the deeper entry of the current search, anything else is overwritten
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.slots[index] = (key, depth, flag, score, best_col, self.generation)
+
+transposition_table = TranspositionTable()  # Shared by all get_computer_move calls of a game
+solver_table = TranspositionTable()  # Exact solver results stay valid across games
+_opening_book = None
+_search_cache = None
+_executor = None
+_executor_workers = None
+
+def new_game():
+    transposition_table.clear()  # Forget positions of the previous game
+
+# --------------------------------------------------
+# Search
+# --------------------------------------------------
+class SearchTimeout(Exception):
+    pass
+
+class MoveOrdering:
+    def __init__(self, center=True, hash_move=True, killers=True, history=True):
+        self.center = center  # Static center-out column order
+        self.hash_move = hash_move  # Table / previous iteration best move first
+        self.killers = killers  # Moves that caused a cutoff at the same ply
+        self.history = history  # Cells that caused cutoffs anywhere in the tree
+
+    def __repr__(self):
+        enabled = [name for name in ("center", "hash_move", "killers", "history") if getattr(self, name)]
+        return f"MoveOrdering({', '.join(enabled) or 'none'})"
+
+class SearchStats:
+    def __init__(self):
+        self.source = "search"  # Where the move came from: tactical, book, cache, ponder, solver, search, parallel, mcts
+        self.nodes = 0
+        self.playouts = 0  # Random games simulated by the MCTS engine
+        self.leaf_evals = 0
+        self.cutoffs = {}  # Ply -> beta cutoffs
+        self.first_move_cutoffs = 0  # Cutoffs caused by the first move searched
+        self.tt_hits = 0
+        self.tt_stores = 0
+        self.depth = 0  # Deepest completed iteration
+        self.iterations = []  # (depth, wall time ms, nodes so far) per completed iteration
+        self.time_ms = 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        total = sum(self.cutoffs.values())
+        return self.first_move_cutoffs / total if total else 0.0
+
+    def as_dict(self):
+        return {
+            "source": self.source,
+            "nodes": self.nodes,
+            "playouts": self.playouts,
+            "leaf_evals": self.leaf_evals,
+            "cutoffs": {str(ply): count for ply, count in sorted(self.cutoffs.items())},
+            "first_move_cutoff_rate": round(self.first_move_cutoff_rate, 4),
+            "tt_hits": self.tt_hits,
+            "tt_stores": self.tt_stores,
+            "depth": self.depth,
+            "iterations": self.iterations,
+            "time_ms": round(self.time_ms, 3),
+        }
+
+    def summary(self):
+        nodes_per_sec = self.nodes / (self.time_ms / 1000) if self.time_ms else 0
+        return (f"source={self.source} depth={self.depth} nodes={self.nodes} playouts={self.playouts} "
+                f"leaf_evals={self.leaf_evals} "
+                f"cutoffs={sum(self.cutoffs.values())} first_move_cutoffs={100 * self.first_move_cutoff_rate:.1f}% "
+                f"tt_hits={self.tt_hits} tt_stores={self.tt_stores} time_ms={self.time_ms:.1f} "
+                f"nps={nodes_per_sec:.0f}")
+
+class SearchContext:
+    def __init__(self, table=None, deadline=None, ordering=None, cancel=None):
+        self.table = table
+        self.deadline = deadline  # time.perf_counter() value at which the search is aborted
+        self.cancel = cancel  # threading.Event that aborts the search from another thread
+        self.ordering = ordering if ordering is not None else MoveOrdering()
+        self.stats = SearchStats()
+        self.root_moves = None  # Stones on the board at the root, ply = board.moves - root_moves
+        self.killers = {}
+        self.history = {PLAYER: {}, COMPUTER: {}}
+
+    @property
+    def nodes(self):
+        return self.stats.nodes
+
+    def tick(self):
+        stats = self.stats
+        stats.nodes += 1
+        if not stats.nodes & TIMEOUT_CHECK_NODES:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+            if self.cancel is not None and self.cancel.is_set():
+                raise SearchTimeout()
+
+    def order_moves(self, board, piece, ply, hash_col, allowed=None):
+        ordering = self.ordering
+        layout = board.layout
+        cols = layout.center_order if ordering.center else range(board.cols)
+        if allowed is None:
+            moves = [col for col in cols if board.heights[col] < layout.rows]
+        else:
+            moves = [col for col in cols if allowed & layout.column_masks[col]]
+        if ordering.history:
+            history = self.history[piece]
+            stride = board.layout.stride
+            moves.sort(key=lambda col: -history.get(col * stride + board.heights[col], 0))
+        if ordering.killers:
+            for killer in reversed(self.killers.get(ply, ())):
+                if killer in moves:
+                    moves.remove(killer)
+                    moves.insert(0, killer)
+        if ordering.hash_move and hash_col in moves:
+            moves.remove(hash_col)
+            moves.insert(0, hash_col)
+        return moves  # Columns in search order for the side to move
+
+    def record_cutoff(self, board, piece, ply, depth, col, first):
+        stats = self.stats
+        stats.cutoffs[ply] = stats.cutoffs.get(ply, 0) + 1
+        if first:
+            stats.first_move_cutoffs += 1
+        if self.ordering.killers:
+            killers = self.killers.setdefault(ply, [])
+            if col not in killers:
+                killers.insert(0, col)
+                del killers[2:]  # Two killer slots per ply
+        if self.ordering.history:
+            cell = col * board.layout.stride + board.heights[col]
+            history = self.history[piece]
+            history[cell] = history.get(cell, 0) + depth * depth
+
+def score_to_table(score, ply):
+    # Win scores count plies from the root; the table keeps them relative to the stored node
+    if score >= WIN_SCORE - MAX_WIN_PLIES:
+        return score + ply
+    if score <= -(WIN_SCORE - MAX_WIN_PLIES):
+        return score - ply
+    return score
+
+def score_from_table(score, ply):
+    if score >= WIN_SCORE - MAX_WIN_PLIES:
+        return score - ply
+    if score <= -(WIN_SCORE - MAX_WIN_PLIES):
+        return score + ply
+    return score
+
+def cell_column(cells, layout):
+    return ((cells & -cells).bit_length() - 1) // layout.stride  # Column of the lowest set cell
+
+def tactical_move(board, piece=COMPUTER):
+    position = to_position(board)
+    layout = position.layout
+    current = position.stones[piece]
+    mask = position.occupied
+    winning = winning_cells(current, mask, layout) & playable_cells(mask, layout)
+    if winning:
+        return cell_column(winning, layout)
+    safe = non_losing_moves(current, mask, layout)
+    if safe and not safe & (safe - 1):
+        return cell_column(safe, layout)  # Forced block, or the only move that does not lose at once
+    return None  # Winning or forced column, None when the position needs a search
+
+def minimax(board, depth, alpha, beta, maximizing_player, context=None):
+    if context is None:
+        context = SearchContext()
+    if context.root_moves is None:
+        context.root_moves = board.moves
+    context.tick()
+    table = context.table
+    if depth == 0 or board.is_full():
+        context.stats.leaf_evals += 1
+        return board.score, None
+    piece = COMPUTER if maximizing_player else PLAYER
+    ply = board.moves - context.root_moves
+    layout = board.layout
+    # Tactics first: an immediate win ends the search, moves that hand the opponent a win are pruned
+    current = board.stones[piece]
+    mask = current | board.stones[PLAYER + COMPUTER - piece]
+    winning = winning_cells(current, mask, layout) & playable_cells(mask, layout)
+    if winning:
+        score = WIN_SCORE - (ply + 1)
+        return (score if maximizing_player else -score), cell_column(winning, layout)
+    safe = non_losing_moves(current, mask, layout)
+    if not safe:
+        score = WIN_SCORE - (ply + 2)
+        return (-score if maximizing_player else score), cell_column(playable_cells(mask, layout), layout)
+    hash_col = None
+    if table is not None:
+        key = board.key() << 1 | maximizing_player
+        entry = table.lookup(key)
+        if entry is not None:
+            context.stats.tt_hits += 1
+            _, entry_depth, flag, score, hash_col, _ = entry
+            score = score_from_table(score, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score, hash_col
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score, hash_col
+        alpha_orig, beta_orig = alpha, beta
+    valid_locations = context.order_moves(board, piece, ply, hash_col, safe)
+    best_col = valid_locations[0]
     if maximizing_player:
-        max_eval = -math.inf
-        best_col = random.choice(valid_locations)
+        best_eval = -math.inf
         for col in valid_locations:
-            row = get_next_available_row(board, col)
-            temp_board = board.copy()
-            drop_piece(temp_board, row, col, COMPUTER)
-            eval_score, _ = minimax(temp_board, depth-1, alpha, beta, False)
-            if eval_score > max_eval:
-                max_eval = eval_score
+            board.play(col, COMPUTER)
+            try:
+                eval_score, _ = minimax(board, depth-1, alpha, beta, False, context)
+            finally:
+                board.undo(col)
+            if eval_score > best_eval:
+                best_eval = eval_score
                 best_col = col
             alpha = max(alpha, eval_score)
             if beta <= alpha:
+                context.record_cutoff(board, piece, ply, depth, col, col == valid_locations[0])
                 break
-        return max_eval, best_col
     else:
-        min_eval = math.inf
-        best_col = random.choice(valid_locations)
+        best_eval = math.inf
         for col in valid_locations:
-            row = get_next_available_row(board, col)
-            temp_board = board.copy()
-            drop_piece(temp_board, row, col, PLAYER)
-            eval_score, _ = minimax(temp_board, depth-1, alpha, beta, True)
-            if eval_score < min_eval:
-                min_eval = eval_score
+            board.play(col, PLAYER)
+            try:
+                eval_score, _ = minimax(board, depth-1, alpha, beta, True, context)
+            finally:
+                board.undo(col)
+            if eval_score < best_eval:
+                best_eval = eval_score
                 best_col = col
             beta = min(beta, eval_score)
             if beta <= alpha:
+                context.record_cutoff(board, piece, ply, depth, col, col == valid_locations[0])
                 break
-        return min_eval, best_col  # Minimax with alpha-beta pruning
+    if table is not None:
+        if best_eval <= alpha_orig:
+            flag = UPPER_BOUND
+        elif best_eval >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        table.store(key, depth, flag, score_to_table(best_eval, ply), best_col)
+        context.stats.tt_stores += 1
+    return best_eval, best_col  # Minimax with alpha-beta pruning
+
+def search(board, depth=None, time_budget_ms=None, table=None, ordering=None, solver_empty_cells=None,
+           context=None):
+    position = to_position(board).copy()  # The search plays and takes back moves in place
+    if context is None:
+        context = SearchContext(table if table is not None else transposition_table, ordering=ordering)
+    if context.table is not None:
+        context.table.new_search()
+    start = time.perf_counter()
+    try:
+        return _run_search(position, depth, time_budget_ms, solver_empty_cells, context, start)
+    finally:
+        context.stats.time_ms = (time.perf_counter() - start) * 1000
+
+def _solve_endgame(position, time_budget_ms, solver_empty_cells, context, start):
+    if solver_empty_cells is None:
+        solver_empty_cells = SOLVER_EMPTY_CELLS
+    empty_cells = position.rows * position.cols - position.moves
+    if not 0 < empty_cells <= solver_empty_cells or check_win(position, PLAYER) or check_win(position, COMPUTER):
+        return None
+    # Endgame: the exact result replaces the heuristic, given at most half of the time budget
+    deadline = None if time_budget_ms is None else start + time_budget_ms / 2000
+    try:
+        score, col = solve(position, COMPUTER, deadline, context=context)
+    except SearchTimeout:
+        return None
+    context.stats.source = "solver"
+    context.stats.depth = empty_cells
+    return solved_score_to_eval(score, position), col  # None when the heuristic search has to decide
 
-def get_computer_move(board, depth):
-    _, col = minimax(board, depth, -math.inf, math.inf, True)
+def _run_search(position, depth, time_budget_ms, solver_empty_cells, context, start):
+    stats = context.stats
+    solved = _solve_endgame(position, time_budget_ms, solver_empty_cells, context, start)
+    if solved is not None:
+        return solved
+    if time_budget_ms is None:
+        result = minimax(position, depth or SEARCH_DEPTH, -math.inf, math.inf, True, context)
+        stats.depth = depth or SEARCH_DEPTH
+        stats.iterations.append((stats.depth, round((time.perf_counter() - start) * 1000, 3), stats.nodes))
+        return result
+    # Iterative deepening: the table hands each iteration the best moves of the previous one
+    max_depth = depth or position.rows * position.cols - position.moves
+    best_score, best_col = None, None
+    for current_depth in range(1, max_depth + 1):
+        try:
+            best_score, best_col = minimax(position, current_depth, -math.inf, math.inf, True, context)
+        except SearchTimeout:
+            break
+        stats.depth = current_depth
+        stats.iterations.append((current_depth, round((time.perf_counter() - start) * 1000, 3), stats.nodes))
+        if context.deadline is None:  # Depth 1 always completes, the clock starts afterwards
+            context.deadline = start + time_budget_ms / 1000
+    return best_score, best_col  # Score and best column for the computer
+
+# --------------------------------------------------
+# Multi-PV analysis
+# --------------------------------------------------
+def analyze_moves(board, depth=None, time_budget_ms=None, table=None, ordering=None, context=None):
+    position = to_position(board).copy()
+    if context is None:
+        context = SearchContext(table if table is not None else transposition_table, ordering=ordering)
+    if context.table is not None:
+        context.table.new_search()
+    context.root_moves = position.moves
+    start = time.perf_counter()
+    try:
+        return _analyze_root(position, depth, time_budget_ms, context, start)
+    finally:
+        context.stats.time_ms = (time.perf_counter() - start) * 1000
+
+def _analyze_root(position, depth, time_budget_ms, context, start):
+    stats = context.stats
+    layout = position.layout
+    current = position.stones[COMPUTER]
+    mask = position.occupied
+    cols = context.order_moves(position, COMPUTER, 0, None)
+    winning = winning_cells(current, mask, layout)
+    safe = non_losing_moves(current, mask, layout)
+    # Wins and moves that lose at once need no search
+    known = {}
+    for col in cols:
+        if winning & layout.column_masks[col] & playable_cells(mask, layout):
+            known[col] = WIN_SCORE - 1
+        elif not safe & layout.column_masks[col]:
+            known[col] = -(WIN_SCORE - 2)
+    if time_budget_ms is None:
+        depths = [depth or SEARCH_DEPTH]
+    else:
+        depths = range(1, (depth or position.rows * position.cols - position.moves) + 1)
+    scores = dict(known)
+    for current_depth in depths:
+        # Every root move gets a full window, so each score is exact at this depth; the shared
+        # table and the previous iteration's order let the moves reuse each other's work
+        iteration = dict(known)
+        try:
+            for col in sorted(cols, key=lambda col: -scores.get(col, 0)):
+                if col in iteration:
+                    continue
+                position.play(col, COMPUTER)
+                try:
+                    iteration[col] = minimax(position, current_depth - 1, -math.inf, math.inf, False, context)[0]
+                finally:
+                    position.undo(col)
+        except SearchTimeout:
+            break
+        scores = iteration
+        stats.depth = current_depth
+        stats.iterations.append((current_depth, round((time.perf_counter() - start) * 1000, 3), stats.nodes))
+        if time_budget_ms is not None and context.deadline is None:  # Depth 1 always completes
+            context.deadline = start + time_budget_ms / 1000
+    return {col: scores[col] for col in sorted(scores)}  # Score of every playable column for the computer
+
+def win_probability(score):
+    if score >= WIN_SCORE - MAX_WIN_PLIES:
+        return 1.0
+    if score <= -(WIN_SCORE - MAX_WIN_PLIES):
+        return 0.0
+    return 1 / (1 + math.exp(-score / WIN_PROBABILITY_SCALE))  # Rough chance that the computer wins
+
+# --------------------------------------------------
+# Monte Carlo tree search
+# --------------------------------------------------
+# UCT tree search whose leaves are valued by a batch of random games played out all
+# at once on uint64 bitboards, one array element per game. Playouts are lightly
+# guided: a side wins when it can and blocks a single immediate threat.
+
+class PlayoutMasks:
+    def __init__(self, layout):
+        if layout.cols * layout.stride > 64:
+            raise ValueError(f"{layout.rows}x{layout.cols} positions do not fit the 64 bit playout boards")
+        self.bottom = np.uint64(layout.bottom_mask)
+        self.board = np.uint64(layout.board_mask)
+        self.columns = np.array(layout.column_masks, dtype=np.uint64)
+        self.one = np.uint64(1)
+        self.shifts = [tuple(np.uint64(k * shift) for k in (1, 2, 3))
+                       for shift in (layout.stride, layout.stride - 1, layout.stride + 1)]
+
+@functools.lru_cache(maxsize=None)
+def get_playout_masks(layout):
+    return PlayoutMasks(layout)
+
+def _winning_cells_batch(stones, mask, masks):
+    one = masks.one
+    cells = (stones << one) & (stones << one + one) & (stones << one + one + one)  # Vertical
+    for once, twice, thrice in masks.shifts:  # Same shifts as winning_cells, one game per element
+        pair = (stones << once) & (stones << twice)
+        cells |= pair & (stones << thrice)
+        cells |= pair & (stones >> once)
+        pair = (stones >> once) & (stones >> twice)
+        cells |= pair & (stones << once)
+        cells |= pair & (stones >> thrice)
+    return cells & (masks.board ^ mask)
+
+def random_playouts(current, mask, layout, count, rng):
+    masks = get_playout_masks(layout)
+    current = np.full(count, current, dtype=np.uint64)
+    mask = np.full(count, mask, dtype=np.uint64)
+    games = np.arange(count)
+    results = np.full(count, 0.5)  # Games that fill the board are draws
+    first_to_move = True
+    while games.size:
+        playable = (mask + masks.bottom) & masks.board
+        wins = _winning_cells_batch(current, mask, masks) & playable
+        won = wins != 0
+        results[games[won]] = 1.0 if first_to_move else 0.0
+        going = ~won & (playable != 0)
+        current, mask, games, playable = current[going], mask[going], games[going], playable[going]
+        if not games.size:
+            break
+        # A random open column, or the cell that stops an opponent four
+        open_columns = (playable[:, np.newaxis] & masks.columns) != 0
+        cols = np.argmax(rng.random(open_columns.shape) * open_columns, axis=1)
+        move = playable & masks.columns[cols]
+        threats = _winning_cells_batch(current ^ mask, mask, masks) & playable
+        move = np.where(threats != 0, threats & (~threats + masks.one), move)
+        current, mask = current ^ mask, mask | move  # The other side is to move
+        first_to_move = not first_to_move
+    return float(results.sum())  # Total result for the side to move, 1 per win and 0.5 per draw
+
+class MCTSNode:
+    __slots__ = ("col", "parent", "children", "untried", "visits", "score", "result")
+
+    def __init__(self, col, parent, position, result=None):
+        self.col = col  # Move that led here
+        self.parent = parent
+        self.children = []
+        self.result = result  # "win" when the move into this node won, "draw" when it filled the board
+        self.untried = [] if result else [c for c in reversed(position.layout.center_order) if position.can_play(c)]
+        self.visits = 0
+        self.score = 0.0  # Summed results for the side that moved into this node
+
+    def select_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.score / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+def mcts_search(board, time_budget_ms=None, iterations=None, batch_size=MCTS_BATCH_SIZE,
+                exploration=MCTS_EXPLORATION, seed=None, stats=None):
+    position = to_position(board).copy()
+    layout = position.layout
+    get_playout_masks(layout)  # Fails early for boards too large for the playouts
+    if stats is None:
+        stats = SearchStats()
+    stats.source = "mcts"
+    if time_budget_ms is None and iterations is None:
+        iterations = MCTS_ITERATIONS
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    deadline = None if time_budget_ms is None else start + time_budget_ms / 1000
+    root = MCTSNode(None, None, position)
+    if not root.untried:
+        return None, None
+    done = 0
+    # Every root move gets at least one batch, as alpha-beta always completes depth 1
+    while root.untried or \
+            (iterations is None or done < iterations) and (deadline is None or time.perf_counter() < deadline):
+        node = root
+        piece = COMPUTER
+        played = []
+        # Selection, then expansion of one untried move
+        while not node.result and not node.untried:
+            node = node.select_child(exploration)
+            position.play(node.col, piece)
+            played.append(node.col)
+            piece = PLAYER + COMPUTER - piece
+        if not node.result:
+            col = node.untried.pop()
+            position.play(col, piece)
+            played.append(col)
+            result = "win" if check_win(position, piece) else "draw" if position.is_full() else None
+            piece = PLAYER + COMPUTER - piece
+            child = MCTSNode(col, node, position, result)
+            node.children.append(child)
+            node = child
+            stats.nodes += 1
+        # Simulation from the side to move at the leaf
+        if node.result == "win":
+            total = 0.0
+        elif node.result == "draw":
+            total = batch_size / 2
+        else:
+            total = random_playouts(position.stones[piece], position.occupied, layout, batch_size, rng)
+            stats.playouts += batch_size
+        # Backpropagation, alternating the point of view
+        score = 1 - total / batch_size
+        while node is not None:
+            node.visits += 1
+            node.score += score
+            score = 1 - score
+            node = node.parent
+        for col in reversed(played):
+            position.undo(col)
+        done += 1
+    stats.iterations.append((done, round((time.perf_counter() - start) * 1000, 3), stats.playouts))
+    best = max(root.children, key=lambda child: child.visits)
+    return best.score / best.visits, best.col  # Expected result of the most visited move, and the move
+
+# --------------------------------------------------
+# Exact solver
+# --------------------------------------------------
+# Negamax over (current, mask) bitboards, where current holds the stones of the side
+# to move and mask all stones. Scores follow the usual Connect Four solver convention:
+# positive when the side to move wins, larger the sooner it wins, 0 for a draw.
+
+def playable_cells(mask, layout):
+    return (mask + layout.bottom_mask) & layout.board_mask  # Lowest empty cell of every open column
+
+def winning_cells(stones, mask, layout):
+    stride = layout.stride
+    cells = (stones << 1) & (stones << 2) & (stones << 3)  # Vertical
+    for shift in (stride, stride - 1, stride + 1):  # Horizontal and both diagonals
+        pair = (stones << shift) & (stones << 2 * shift)
+        cells |= pair & (stones << 3 * shift)
+        cells |= pair & (stones >> shift)
+        pair = (stones >> shift) & (stones >> 2 * shift)
+        cells |= pair & (stones << shift)
+        cells |= pair & (stones >> 3 * shift)
+    return cells & (layout.board_mask ^ mask)  # Empty cells that would complete four for stones
+
+def non_losing_moves(current, mask, layout):
+    playable = playable_cells(mask, layout)
+    opponent_wins = winning_cells(current ^ mask, mask, layout)
+    forced = playable & opponent_wins
+    if forced:
+        if forced & (forced - 1):
+            return 0  # Two threats at once cannot both be blocked
+        playable = forced
+    return playable & ~(opponent_wins >> 1)  # Never play right below an opponent threat
+
+def _toward_zero(value):
+    return int(value / 2)
+
+class Solver:
+    def __init__(self, layout, table=None, deadline=None):
+        self.layout = layout
+        self.table = table if table is not None else solver_table
+        self.deadline = deadline
+        self.cells = layout.rows * layout.cols
+        self.nodes = 0
+
+    def negamax(self, current, mask, moves, alpha, beta):
+        # Assumes the side to move cannot win immediately
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & TIMEOUT_CHECK_NODES:
+            if time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+        layout = self.layout
+        possible = non_losing_moves(current, mask, layout)
+        if not possible:
+            return -((self.cells - moves) // 2)
+        if moves >= self.cells - 2:
+            return 0
+        lowest = -((self.cells - 2 - moves) // 2)
+        highest = (self.cells - 1 - moves) // 2
+        key = current + mask + layout.bottom_mask
+        entry = self.table.lookup(key)
+        hash_col = None
+        if entry is not None:
+            _, _, flag, score, hash_col, _ = entry
+            if flag == UPPER_BOUND:
+                highest = min(highest, score)
+            else:
+                lowest = max(lowest, score)
+        alpha = max(alpha, lowest)
+        beta = min(beta, highest)
+        if alpha >= beta:
+            return alpha
+        candidates = []
+        for col in layout.center_order:
+            move = possible & layout.column_masks[col]
+            if move:
+                threats = (winning_cells(current | move, mask, layout)).bit_count()
+                candidates.append((col != hash_col, -threats, col, move))
+        candidates.sort(key=lambda candidate: candidate[:2])  # Stable, so center order breaks ties
+        best_col = candidates[0][2]
+        for _, _, col, move in candidates:
+            score = -self.negamax(current ^ mask, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                self.table.store(key, self.cells - moves, LOWER_BOUND, score, col)
+                return score
+            if score > alpha:
+                alpha = score
+                best_col = col
+        self.table.store(key, self.cells - moves, UPPER_BOUND, alpha, best_col)
+        return alpha
+
+    def solve(self, current, mask, moves):
+        if winning_cells(current, mask, self.layout) & playable_cells(mask, self.layout):
+            return (self.cells + 1 - moves) // 2
+        lowest = -((self.cells - moves) // 2)
+        highest = (self.cells + 1 - moves) // 2
+        while lowest < highest:  # Null-window searches narrow the score down
+            middle = lowest + (highest - lowest) // 2
+            if middle <= 0 and _toward_zero(lowest) < middle:
+                middle = _toward_zero(lowest)
+            elif middle >= 0 and _toward_zero(highest) > middle:
+                middle = _toward_zero(highest)
+            result = self.negamax(current, mask, moves, middle, middle + 1)
+            if result <= middle:
+                highest = result
+            else:
+                lowest = result
+        return lowest  # Exact score for the side to move
+
+def solve(board, piece=COMPUTER, deadline=None, table=None, context=None):
+    position = to_position(board)
+    solver = Solver(position.layout, table, deadline)
+    try:
+        return _solve(position, piece, solver)
+    finally:
+        if context is not None:
+            context.stats.nodes += solver.nodes  # Report solver work with the rest of the search
+
+def _solve(position, piece, solver):
+    layout = position.layout
+    solver.table.new_search()
+    current = position.stones[piece]
+    mask = position.occupied
+    moves = position.moves
+    playable = playable_cells(mask, layout)
+    cols = [col for col in layout.center_order if playable & layout.column_masks[col]]
+    if not cols:
+        return 0, None
+    winning = winning_cells(current, mask, layout) & playable
+    for col in cols:
+        if winning & layout.column_masks[col]:
+            return (solver.cells + 1 - moves) // 2, col
+    score = solver.solve(current, mask, moves)
+    safe = non_losing_moves(current, mask, layout)
+    for col in cols:
+        move = safe & layout.column_masks[col]
+        # A column is best when the opponent cannot hold the score below -score after it
+        if move and solver.negamax(current ^ mask, mask | move, moves + 1, -score, -score + 1) <= -score:
+            return score, col
+    forced = [col for col in cols if safe & layout.column_masks[col]]
+    return score, (forced or cols)[0]  # Exact score for piece to move, and a column that reaches it
+
+def solver_outcome(score, position):
+    # Game result for the side to move and the plies until it is decided
+    cells = position.rows * position.cols
+    moves = position.moves
+    if score == 0:
+        return "draw", cells - moves
+    if score > 0:
+        stones = cells + 1 - 2 * score  # Stones on the board before the winning move
+        if (stones - moves) % 2:
+            stones -= 1
+        return "win", stones - moves + 1
+    stones = cells + 1 + 2 * score
+    if (stones - moves - 1) % 2:
+        stones -= 1
+    return "loss", stones - moves + 1
+
+def solved_score_to_eval(score, position):
+    outcome, plies = solver_outcome(score, position)
+    if outcome == "win":
+        return WIN_SCORE - plies
+    if outcome == "loss":
+        return -(WIN_SCORE - plies)
+    return 0  # Solver score on the minimax scale
+
+# --------------------------------------------------
+# Parallel search
+# --------------------------------------------------
+def get_executor(workers):
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        shutdown_executor()
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor  # Worker pool kept alive between moves
+
+def shutdown_executor():
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+    _executor = None
+    _executor_workers = None
+
+def _search_root_move(position, col, max_depth, time_budget_s, ordering):
+    # Runs in a worker: deepen one root column with its own table until max_depth or its
+    # time share runs out, returning the score of every completed depth and the nodes searched.
+    # The clock starts when the worker picks the column up, so queued columns get their full share
+    context = SearchContext(TranspositionTable(WORKER_TT_MAX_MB), ordering=ordering)
+    context.root_moves = position.moves  # Plies count from the real root, as in the serial search
+    if time_budget_s is not None:
+        context.deadline = time.perf_counter() + time_budget_s
+    position.play(col, COMPUTER)
+    scores = [position.score]  # Depth 1 is the leaf score of the child
+    for current_depth in range(2, max_depth + 1):
+        try:
+            score, _ = minimax(position, current_depth - 1, -math.inf, math.inf, False, context)
+        except SearchTimeout:
+            break
+        scores.append(score)
+    return scores, context.stats.nodes
+
+def parallel_search(board, depth=None, time_budget_ms=None, workers=None, ordering=None, stats=None,
+                    solver_empty_cells=None):
+    position = to_position(board)
+    if stats is None:
+        stats = SearchStats()
+    stats.source = "parallel"
+    start = time.perf_counter()
+    # Endgames are solved exactly here as well, so the result matches search()
+    context = SearchContext()
+    context.stats = stats
+    solved = _solve_endgame(position, time_budget_ms, solver_empty_cells, context, start)
+    if solved is not None:
+        stats.time_ms = (time.perf_counter() - start) * 1000
+        return solved
+    workers = workers or os.cpu_count()
+    layout = position.layout
+    current = position.stones[COMPUTER]
+    mask = position.occupied
+    playable = playable_cells(mask, layout)
+    if not playable:
+        return evaluate_board(position), None
+    winning = winning_cells(current, mask, layout) & playable
+    if winning:
+        return WIN_SCORE - 1, cell_column(winning, layout)
+    # Same root moves and the same answer as minimax: those that do not lose at once, and the
+    # lowest playable column with the loss score when every move loses
+    safe = non_losing_moves(current, mask, layout)
+    if not safe:
+        return -(WIN_SCORE - 2), cell_column(playable, layout)
+    root_moves = SearchContext(ordering=ordering).order_moves(position, COMPUTER, 0, None, safe)
+    if time_budget_ms is None:
+        max_depth, time_share_s = depth or SEARCH_DEPTH, None
+    else:
+        max_depth = depth or position.rows * position.cols - position.moves
+        # Columns beyond the worker count wait for a free worker, so the budget left after a
+        # timed-out solve is split between the rounds the workers need for all columns
+        remaining_s = time_budget_ms / 1000 - (time.perf_counter() - start)
+        rounds = -(-len(root_moves) // workers)
+        time_share_s = max(remaining_s, 0) / rounds
+    executor = get_executor(workers)
+    futures = [executor.submit(_search_root_move, position, col, max_depth, time_share_s, ordering)
+               for col in root_moves]
+    results = [future.result() for future in futures]
+    # Use the deepest iteration every column completed; the first best column in the serial
+    # root order wins ties, as it does in minimax
+    completed = min(len(scores) for scores, _ in results)
+    scores = [scores[completed - 1] for scores, _ in results]
+    best_score = max(scores)
+    stats.nodes += sum(nodes for _, nodes in results)
+    stats.depth = completed
+    stats.time_ms = (time.perf_counter() - start) * 1000
+    return best_score, root_moves[scores.index(best_score)]
+
+# --------------------------------------------------
+# Batch analysis
+# --------------------------------------------------
+def _analyze_chunk(boards, depth, time_budget_ms):
+    # Runs in a worker; a fresh table per board, as on the single-process path, keeps the
+    # results independent of the worker count and of which boards a worker saw before
+    return [search(board, depth, time_budget_ms, table=TranspositionTable()) for board in boards]
+
+def analyze_positions(boards, depth=None, time_budget_ms=None, workers=None, chunksize=None):
+    # Score and best column, computer to move, for a list of boards or an (N, rows, cols) array
+    boards = list(boards)
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(boards) <= 1:
+        return [search(board, depth, time_budget_ms, table=TranspositionTable()) for board in boards]
+    if chunksize is None:
+        chunksize = max(1, len(boards) // (workers * 4))
+    chunks = [boards[i:i + chunksize] for i in range(0, len(boards), chunksize)]
+    executor = get_executor(workers)
+    futures = [executor.submit(_analyze_chunk, chunk, depth, time_budget_ms) for chunk in chunks]
+    return [result for future in futures for result in future.result()]
+
+def get_opening_book():
+    global _opening_book
+    if _opening_book is None:
+        book = OpeningBook.open(OPENING_BOOK_PATH)
+        _opening_book = book if book is not None else False
+    return _opening_book if _opening_book is not False else None  # Opened once per process, None without a book file
+
+def get_search_cache():
+    global _search_cache
+    if _search_cache is None:
+        try:
+            _search_cache = SearchCache(SEARCH_CACHE_PATH)
+        except sqlite3.Error as e:
+            print(f"Error opening search cache: {e}")
+            _search_cache = False
+    return _search_cache if _search_cache is not False else None  # Opened once per process, None when unusable
+
+def get_computer_move(board, depth=None, time_budget_ms=None, table=None, ordering=None, use_book=True,
+                      workers=None, use_cache=USE_SEARCH_CACHE, return_stats=False, engine="alphabeta",
+                      pondered=None):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    start = time.perf_counter()
+    stats = SearchStats()
+    col = _find_computer_move(to_position(board), depth, time_budget_ms, table, ordering, use_book, workers,
+                              use_cache, stats, engine, pondered)
+    stats.time_ms = (time.perf_counter() - start) * 1000
+    if return_stats:
+        return col, stats
     return col  # Get best move for computer
 
-def initialize_xml():
+def _find_computer_move(position, depth, time_budget_ms, table, ordering, use_book, workers, use_cache, stats,
+                        engine="alphabeta", pondered=None):
+    if position.evaluation is not DEFAULT_EVALUATION or engine == "mcts":
+        use_cache = False  # The cache holds alpha-beta results of the default weights
+    if position.evaluation is not DEFAULT_EVALUATION:
+        use_book = False
+    col = tactical_move(position, COMPUTER)
+    if col is not None:
+        stats.source = "tactical"
+        return col
+    if use_book:
+        book = get_opening_book()
+        col = book.lookup(position) if book is not None else None
+        if col is not None and is_valid_location(position, col):
+            stats.source = "book"
+            return col
+    cache = get_search_cache() if use_cache else None
+    if cache is not None:
+        # A timed search is satisfied by any entry that was searched at least CACHE_MIN_TIMED_DEPTH deep
+        required_depth = depth or SEARCH_DEPTH if time_budget_ms is None else CACHE_MIN_TIMED_DEPTH
+        entry = cache.get(position, required_depth)
+        if entry is not None and is_valid_location(position, entry[1]):
+            stats.source = "cache"
+            return entry[1]
+    # A deep enough pondered result (depth, score, column) stands in for the heuristic search,
+    # but not for the exact solver
+    empty_cells = position.rows * position.cols - position.moves
+    if pondered is not None and pondered[0] >= PONDER_MIN_DEPTH and engine == "alphabeta" and \
+            empty_cells > SOLVER_EMPTY_CELLS:
+        stats.source = "ponder"
+        stats.depth = pondered[0]
+        return pondered[2]
+    if engine == "mcts":
+        return mcts_search(position, time_budget_ms, stats=stats)[1]
+    workers = workers or SEARCH_WORKERS
+    if workers > 1:
+        score, col = parallel_search(position, depth, time_budget_ms, workers, ordering, stats)
+    else:
+        context = SearchContext(table if table is not None else transposition_table, ordering=ordering)
+        context.stats = stats
+        score, col = search(position, depth, time_budget_ms, context=context)
+    if cache is not None and col is not None and stats.depth:
+        cache.put(position, stats.depth, score, col)
+    return col
+
+# --------------------------------------------------
+# Pondering
+# --------------------------------------------------
+class Ponderer:
+    def __init__(self, table=None, ordering=None):
+        self.table = table if table is not None else transposition_table
+        self.ordering = ordering
+        self.results = {}  # Player column -> (depth, score, computer column)
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self, board):
+        self.stop()
+        self.results = {}
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, args=(to_position(board).copy(),), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._cancel.set()
+            self._thread.join()
+            self._thread = None
+
+    def result(self, player_col):
+        self.stop()
+        return self.results.get(player_col)  # Search result after the reply that was actually played
+
+    def _run(self, position):
+        self.table.new_search()
+        context = SearchContext(self.table, ordering=self.ordering, cancel=self._cancel)
+        # The previous search left the predicted reply in the table, it is pondered first at every depth
+        entry = self.table.lookup(position.key() << 1 | False)
+        replies = context.order_moves(position, PLAYER, 0, entry[4] if entry is not None else None)
+        children = {}
+        for reply in replies:
+            child = position.copy()
+            child.play(reply, PLAYER)
+            # Replies the solver answers exactly are left to the normal move search
+            if not check_win(child, PLAYER) and child.rows * child.cols - child.moves > SOLVER_EMPTY_CELLS:
+                children[reply] = child
+        for depth in range(1, position.rows * position.cols - position.moves):
+            for reply, child in children.items():
+                if depth > child.rows * child.cols - child.moves:
+                    continue
+                context.root_moves = child.moves
+                try:
+                    score, col = minimax(child, depth, -math.inf, math.inf, True, context)
+                except SearchTimeout:
+                    return
+                self.results[reply] = (depth, score, col)
+
+ORDERING_STEPS = (
+    ("none", MoveOrdering(center=False, hash_move=False, killers=False, history=False)),
+    ("center", MoveOrdering(center=True, hash_move=False, killers=False, history=False)),
+    ("+hash_move", MoveOrdering(center=True, hash_move=True, killers=False, history=False)),
+    ("+killers", MoveOrdering(center=True, hash_move=True, killers=True, history=False)),
+    ("+history", MoveOrdering(center=True, hash_move=True, killers=True, history=True)),
+)
+
+def compare_move_ordering(board, depth=8):
+    position = to_position(board)
+    report = []
+    for name, ordering in ORDERING_STEPS:
+        context = SearchContext(TranspositionTable(), ordering=ordering)
+        for current_depth in range(1, depth + 1):  # Iterative deepening so the hash move has something to offer
+            minimax(position, current_depth, -math.inf, math.inf, True, context)
+        report.append((name, context.stats.nodes))
+    return report  # Node count per cumulative ordering heuristic
+
+def print_move_ordering_report(board, depth=8):
+    report = compare_move_ordering(board, depth)
+    baseline = report[0][1]
+    previous = baseline
+    print(f"Move ordering at depth {depth}:")
+    for name, nodes in report:
+        print(f"  {name:<11} {nodes:>10} nodes  {100 * (1 - nodes / previous):6.1f}% vs previous  {100 * (1 - nodes / baseline):6.1f}% vs none")
+        previous = nodes
+
+def initialize_xml(rows=ROW_COUNT, cols=COLUMN_COUNT):
     if not os.path.exists(XML_FILE):
         root = ET.Element("game")
         player_column = ET.SubElement(root, "player_column")
@@ -130,13 +1310,14 @@ def initialize_xml():
         moves = ET.SubElement(root, "moves")
         moves.text = "[]"
         board_state = ET.SubElement(root, "board_state")
-        board_state.text = "[[0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0]]"
+        board_state.text = str(create_board(rows, cols).tolist())
         stop = ET.SubElement(root, "stop")
         stop.text = "0"
         start_status = ET.SubElement(root, "start")
         start_status.text = "0"
         tree = ET.ElementTree(root)
-        tree.write(XML_FILE)
+        with atomic_path(XML_FILE) as temp_path:
+            tree.write(temp_path)
         print(f"XML file '{XML_FILE}' initialized.")
     else:
         root = ET.Element("game")
@@ -149,13 +1330,14 @@ def initialize_xml():
         moves = ET.SubElement(root, "moves")
         moves.text = "[]"
         board_state = ET.SubElement(root, "board_state")
-        board_state.text = "[[0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0]]"
+        board_state.text = str(create_board(rows, cols).tolist())
         stop = ET.SubElement(root, "stop")
         stop.text = "0"
         start_status = ET.SubElement(root, "start")
         start_status.text = "0"
         tree = ET.ElementTree(root)
-        tree.write(XML_FILE)
+        with atomic_path(XML_FILE) as temp_path:
+            tree.write(temp_path)
         print(f"XML file '{XML_FILE}' reset.")  # Initialize or reset XML file
 
 def read_xml():
@@ -166,8 +1348,8 @@ def read_xml():
         computer_col = int(root.find('computer_column').text)
         status = root.find('status').text
         stop = int(root.find('stop').text)
-        moves = eval(root.find('moves').text)
-        board_state = eval(root.find('board_state').text)
+        moves = ast.literal_eval(root.find('moves').text)
+        board_state = ast.literal_eval(root.find('board_state').text)
         return player_col, computer_col, status, stop, moves, board_state
     except Exception as e:
         print(f"Error reading XML: {e}")
@@ -178,11 +1360,12 @@ def write_xml_start():
         tree = ET.parse(XML_FILE)
         root = tree.getroot()
         root.find('start').text = str(1)
-        tree.write(XML_FILE)
+        with atomic_path(XML_FILE) as temp_path:
+            tree.write(temp_path)
     except Exception as e:
         print(f"Error writing XML: {e}")  # Write updated game status to XML
 
-def write_xml(player_col, computer_col, status, stop, moves, board_state):
+def write_xml(player_col, computer_col, status, stop, moves, board_state, engine_stats=None):
     try:
         tree = ET.parse(XML_FILE)
         root = tree.getroot()
@@ -192,67 +1375,122 @@ def write_xml(player_col, computer_col, status, stop, moves, board_state):
         root.find('stop').text = str(stop)
         root.find('moves').text = str(moves)
         root.find('board_state').text = str(board_state[::-1])
-        tree.write(XML_FILE)
+        if engine_stats is not None:
+            stats_element = root.find('engine_stats')
+            if stats_element is None:
+                stats_element = ET.SubElement(root, "engine_stats")
+            stats_element.text = json.dumps(engine_stats.as_dict())
+        with atomic_path(XML_FILE) as temp_path:
+            tree.write(temp_path)
     except Exception as e:
         print(f"Error writing XML: {e}")  # Write updated game status to XML
 
-def play_game():
-    initialize_xml()  # Ensure the XML file is initialized
-    board = create_board()
-    game_over = False
-    turn = 0
-    moves = []
-    while not game_over:
-        player_col, computer_col, status, stop, moves, board_state = read_xml()
-        if stop == 1:
-            print("The game has been stopped.")
-            break
+def publish_state(channel, xml_export, player_col, computer_col, status, moves, board, engine_stats=None):
+    channel.publish(**game_state_fields(player_col, computer_col, status, 0, moves, board.tolist()))
+    if xml_export:
+        write_xml(player_col, computer_col, status, 0, moves, board.tolist(), engine_stats)  # Optional file copy
 
-        write_xml_start()
-
-        if turn % 2 == 0:  # Player's turn
-            if status == 'player_wait' and player_col != -1:
-                if 0 <= player_col < COLUMN_COUNT and is_valid_location(board, player_col):
-                    row = get_next_available_row(board, player_col)
-                    drop_piece(board, row, player_col, PLAYER)
-                    moves.append(('player', player_col))
-                    write_xml(player_col, -1, 'computer_wait', 0, moves, board.tolist())
-                    if check_win(board, PLAYER):
-                        print("Player wins!")
-                        write_xml(-1, computer_col, 'player_win', 0, moves, board.tolist())
-                        game_over = True
-                else:
-                    print("Invalid move in XML! Try again.")
-            else:
-                print("Waiting for player to make a move...")
+def play_game(rows=ROW_COUNT, cols=COLUMN_COUNT, xml_export=XML_EXPORT):
+    check_board_size(rows, cols)
+    if xml_export:
+        initialize_xml(rows, cols)
+        write_xml_start()  # The game is running, as start=1 in the channel record
+    new_game()
+    board = create_board(rows, cols)
+    moves = []
+    status = 'player_wait'
+    # Moves and stop requests arrive as commands, every change is published to the subscribers
+    channel = StateChannel(GAME_CHANNEL, GAME_DTYPE, create=True)
+    channel.listen_commands()
+    ponderer = Ponderer() if PONDER else None
+    pondered = None
+    move_log = MoveLog() if MOVE_LOG else None
+    if move_log is not None:
+        move_log.start_game(rows, cols)
+    try:
+        publish_state(channel, xml_export, -1, -1, status, moves, board)
+        while True:
+            if status == 'player_wait':
+                command = channel.receive_command(COMMAND_TIMEOUT_S)
+                if command is None:
+                    continue
+                if command.get("stop"):
+                    print("The game has been stopped.")
+                    status = 'stopped'
+                    publish_state(channel, xml_export, -1, -1, status, moves, board)
+                    break
+                player_col = command.get("player_col")
+                if not isinstance(player_col, int) or not 0 <= player_col < board.cols or \
+                        not is_valid_location(board, player_col):
+                    print("Invalid move! Try again.")
+                    continue
+                row = get_next_available_row(board, player_col)
+                drop_piece(board, row, player_col, PLAYER)
+                moves.append(('player', player_col))
+                if move_log is not None:
+                    move_log.append('player', player_col)
+                if ponderer is not None:
+                    pondered = ponderer.result(player_col)
+                status = 'player_win' if check_win(board, PLAYER) else 'computer_wait'
+                publish_state(channel, xml_export, player_col, -1, status, moves, board)
+                if status == 'player_win':
+                    print("Player wins!")
+                    break
 
-        else:  # Computer's turn
-            if status == 'computer_wait':
+            else:  # Computer's turn
                 print("Computer is thinking...")
-                computer_col = get_computer_move(board, 4)
+                # Tactics, book and cache still come first, the pondered move replaces only the search
+                computer_col, stats = get_computer_move(board, time_budget_ms=THINK_TIME_MS, return_stats=True,
+                                                        pondered=pondered)
+                pondered = None
+                print(f"Engine: {stats.summary()}")
                 row = get_next_available_row(board, computer_col)
                 drop_piece(board, row, computer_col, COMPUTER)
                 moves.append(('computer', computer_col))
-                write_xml(-1, computer_col, 'player_wait', 0, moves, board.tolist())
-                if check_win(board, COMPUTER):
+                if move_log is not None:
+                    move_log.append('computer', computer_col, stats)
+                status = 'computer_win' if check_win(board, COMPUTER) else 'player_wait'
+                publish_state(channel, xml_export, -1, computer_col, status, moves, board,
+                              stats if WRITE_ENGINE_STATS else None)
+                if status == 'computer_win':
                     print("Computer wins!")
-                    write_xml(-1, computer_col, 'computer_win', 0, moves, board.tolist())
-                    game_over = True
-
-        if np.all(board != 0):
-            print("It's a tie!")
-            write_xml(-1, -1, 'tie', 0, moves, board.tolist())
-            game_over = True
+                    break
+                if ponderer is not None:
+                    ponderer.start(board)
 
-        turn += 1
-        time.sleep(0.75)
-
-    initialize_xml()
+            if board.is_full():
+                print("It's a tie!")
+                status = 'tie'
+                publish_state(channel, xml_export, -1, -1, status, moves, board)
+                break
+    finally:
+        if ponderer is not None:
+            ponderer.stop()
+        channel.close()
+        if move_log is not None:
+            if status in RESULTS:
+                move_log.end_game(status)
+            move_log.close()
+        if xml_export:
+            initialize_xml(rows, cols)
     
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connect Four game engine")
+    parser.add_argument('--ordering-report', action='store_true',
+                        help="Print the node reduction of each move ordering heuristic and exit.")
+    parser.add_argument('--depth', default=8, type=int,
+                        help="Search depth for --ordering-report (default: 8).")
+    parser.add_argument('--rows', default=ROW_COUNT, type=int,
+                        help=f"Board rows (default from config.yaml: {ROW_COUNT}).")
+    parser.add_argument('--cols', default=COLUMN_COUNT, type=int,
+                        help=f"Board columns (default from config.yaml: {COLUMN_COUNT}).")
+    parser.add_argument('--xml-export', action='store_true',
+                        help="Also write every state change to game_status.xml.")
+    args = parser.parse_args()
+    if args.ordering_report:
+        print_move_ordering_report(create_board(args.rows, args.cols), args.depth)
+        raise SystemExit(0)
     try:
-        play_game()  # Start the game loop
+        play_game(args.rows, args.cols, args.xml_export or XML_EXPORT)  # Start the game loop
     except Exception as e:
-        print(f"Error: {e}")
-    finally:
-        initialize_xml()
\ No newline at end of file
+        print(f"Error: {e}")
\ No newline at end of file
@@ -2,7 +2,8 @@ from paddleocr import TableCellsDetection, TableStructureRecognition
 import numpy as np
 import cv2
 import os
-import time
+import json
+from processing.fileWatch import FileWatcher, atomic_write_bytes, atomic_write_image
 
 # ----------------------------------------------------------
 # Configuration
@@ -10,6 +11,7 @@ import time
 CROP_IMAGE_PATH = "./data/crop.png"
 OUTPUT_DIR = "./data/output/cells"
 PROCESSED_IMAGE_PATH = "./data/processed_live.png"
+CELLS_DONE_PATH = "./data/output/cells.done"  # Replaced after every cell set, the tracker waits on it
 
 def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -29,15 +31,18 @@ def main():
     # ----------------------------------------------------------
     # Main loop
     # ----------------------------------------------------------
+    # The UI replaces crop.png atomically, so wake only then instead of polling
+    watcher = FileWatcher([CROP_IMAGE_PATH])
+    changed = os.path.exists(CROP_IMAGE_PATH)
     while True:
-        if not os.path.exists(CROP_IMAGE_PATH):
-            time.sleep(0.5)
+        if not changed:
+            changed = watcher.wait()
             continue
+        changed = False
 
         frame = cv2.imread(CROP_IMAGE_PATH)
 
         if frame is None:
-            time.sleep(0.5)
             continue
 
         frame = cv2.resize(frame, (640, 480))
@@ -104,9 +109,11 @@ def main():
                 f"cell_{idx:02d}.png"
             )
 
-            cv2.imwrite(save_path, crop)
+            atomic_write_image(save_path, crop)
             print("Saved:", save_path)
 
+        atomic_write_bytes(CELLS_DONE_PATH, json.dumps({"cells": len(all_cells_sorted)}).encode("utf-8"))
+
         # ------------------------------------------------------
         # Step 2: Table structure
         # ------------------------------------------------------
@@ -115,7 +122,7 @@ def main():
             gray, 150, 255, cv2.THRESH_BINARY
         )
 
-        cv2.imwrite(PROCESSED_IMAGE_PATH, processed_image)
+        atomic_write_image(PROCESSED_IMAGE_PATH, processed_image)
 
         output_structure = model_structure.predict(
             processed_image,
@@ -124,8 +131,5 @@ def main():
 
         print("Structure boxes:", output_structure[0]['boxes'])
 
-        # detection rate
-        time.sleep(2)
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
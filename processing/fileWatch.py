@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import contextlib
+
+# --------------------------------------------------
+# Configuration
+# --------------------------------------------------
+# Files are handed between processes by writing a temporary file next to the
+# target and renaming it over the target, so a reader never sees a partial file.
+# FileWatcher wakes a consumer when a watched file is replaced or rewritten; it
+# uses inotify on Linux and falls back to polling the file stats elsewhere.
+POLL_INTERVAL_S = 0.1
+REPLACE_RETRIES = 10  # Windows refuses the rename while a reader has the target open
+REPLACE_RETRY_S = 0.01
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length; the name follows
+INOTIFY_READ_BYTES = 65536
+
+_libc = None
+
+
+# --------------------------------------------------
+# Atomic writes
+# --------------------------------------------------
+@contextlib.contextmanager
+def atomic_path(path):
+    """Yield a temporary path to write; it replaces path when the block succeeds."""
+    root, ext = os.path.splitext(path)
+    temp_path = f"{root}.tmp{os.getpid()}{ext}"  # Keeps the extension for writers that go by it
+    try:
+        yield temp_path
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(REPLACE_RETRY_S)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def atomic_write_bytes(path, data):
+    with atomic_path(path) as temp_path:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+
+
+def atomic_write_image(path, image):
+    import cv2
+
+    ok, data = cv2.imencode(os.path.splitext(path)[1], image)
+    if not ok:
+        raise ValueError(f"Could not encode image for '{path}'")
+    atomic_write_bytes(path, data.tobytes())
+
+
+# --------------------------------------------------
+# Watching
+# --------------------------------------------------
+def _inotify():
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                _libc = libc
+            except (OSError, AttributeError):
+                pass
+    return _libc if _libc is not False else None  # libc with inotify, None where it is not available
+
+
+class FileWatcher:
+    def __init__(self, paths, poll_interval=POLL_INTERVAL_S):
+        self.paths = {os.path.abspath(path) for path in paths}
+        self.poll_interval = poll_interval
+        self._fd = None
+        self._directories = {}
+        libc = _inotify()
+        if libc is not None:
+            self._start_inotify(libc)
+        if self._fd is None:
+            self._stamps = {path: self._stamp(path) for path in self.paths}
+
+    @property
+    def backend(self):
+        return "inotify" if self._fd is not None else "polling"
+
+    def _start_inotify(self, libc):
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+        for directory in {os.path.dirname(path) for path in self.paths}:
+            os.makedirs(directory, exist_ok=True)
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                print(f"inotify watch on '{directory}' failed ({os.strerror(ctypes.get_errno())}), polling instead")
+                os.close(fd)
+                self._directories = {}
+                return
+            self._directories[wd] = directory
+        self._fd = fd
+
+    def wait(self, timeout=None):
+        """Block until watched files change; return their paths, or [] after timeout seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            changed = self._read_inotify(remaining) if self._fd is not None else self._poll(remaining)
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return sorted(changed)
+
+    def _read_inotify(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, INOTIFY_READ_BYTES)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            path = os.path.join(self._directories.get(wd, ""), os.fsdecode(name))
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _poll(self, timeout):
+        time.sleep(self.poll_interval if timeout is None else min(self.poll_interval, timeout))
+        changed = set()
+        for path in self.paths:
+            stamp = self._stamp(path)
+            if stamp != self._stamps[path]:
+                self._stamps[path] = stamp
+                if stamp is not None:
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,245 @@
+import json
+import time
+import uuid
+import socket
+import argparse
+import threading
+import socketserver
+
+from processing import connectFour as engine
+
+# --------------------------------------------------
+# Configuration
+# --------------------------------------------------
+# Protocol: one JSON object per line in both directions. Requests carry a "cmd"
+# and its fields, replies {"ok": true, ...} or {"ok": false, "error": "..."}.
+#
+#   {"cmd": "new", "rows": 6, "cols": 7, "computer_first": false, "think_time_ms": 1500}
+#   {"cmd": "move", "session": "<id>", "col": 3}   player move, answered with the computer reply
+#   {"cmd": "state", "session": "<id>"}
+#   {"cmd": "close", "session": "<id>"}
+#   {"cmd": "list"}
+HOST = "127.0.0.1"
+PORT = 5050
+SESSION_TIMEOUT_S = 3600  # Sessions without requests for this long are dropped
+MAX_LINE_BYTES = 65536
+
+# All sessions share the engine, its transposition table, book, cache and solver
+# table. Searches are pure Python, so they run one at a time under this lock.
+ENGINE_LOCK = threading.Lock()
+
+
+class GameError(Exception):
+    pass
+
+
+class GameSession:
+    def __init__(self, rows, cols, think_time_ms):
+        engine.check_board_size(rows, cols)
+        if not isinstance(think_time_ms, int) or isinstance(think_time_ms, bool) or think_time_ms <= 0:
+            raise GameError(f"Invalid think_time_ms {think_time_ms!r}, must be a positive integer")
+        self.id = uuid.uuid4().hex[:12]
+        self.board = engine.create_board(rows, cols)
+        self.think_time_ms = think_time_ms
+        self.moves = []
+        self.status = "player_wait"
+        self.engine_stats = None
+        self.lock = threading.Lock()  # One request per session at a time
+        self.used = time.monotonic()
+
+    def state(self):
+        return {
+            "session": self.id,
+            "rows": self.board.rows,
+            "cols": self.board.cols,
+            "status": self.status,
+            "moves": self.moves,
+            "board_state": self.board.tolist(),
+            "engine_stats": self.engine_stats,
+        }
+
+    def play_player(self, col):
+        if self.status != "player_wait":
+            raise GameError(f"Not the player's turn ({self.status})")
+        if not isinstance(col, int) or not 0 <= col < self.board.cols or not engine.is_valid_location(self.board, col):
+            raise GameError(f"Invalid column {col!r}")
+        self.board.play(col, engine.PLAYER)  # Undoable, see play_turn
+        self.moves.append(("player", col))
+        self.status = "computer_wait"
+        if engine.check_win(self.board, engine.PLAYER):
+            self.status = "player_win"
+        elif self.board.is_full():
+            self.status = "tie"
+
+    def play_turn(self, col):
+        self.play_player(col)
+        if self.status != "computer_wait":
+            return
+        try:
+            self.play_computer()
+        except Exception:
+            # Take the player move back so the client can retry instead of the session waiting forever
+            self.board.undo(col)
+            self.moves.pop()
+            self.status = "player_wait"
+            raise
+
+    def play_computer(self):
+        with ENGINE_LOCK:
+            col, stats = engine.get_computer_move(self.board, time_budget_ms=self.think_time_ms, return_stats=True)
+        engine.drop_piece(self.board, engine.get_next_available_row(self.board, col), col, engine.COMPUTER)
+        self.moves.append(("computer", col))
+        self.engine_stats = stats.as_dict()
+        self.status = "player_wait"
+        if engine.check_win(self.board, engine.COMPUTER):
+            self.status = "computer_win"
+        elif self.board.is_full():
+            self.status = "tie"
+        return col
+
+
+class GameServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host=HOST, port=PORT, think_time_ms=engine.THINK_TIME_MS):
+        super().__init__((host, port), GameRequestHandler)
+        self.think_time_ms = think_time_ms
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+
+    def session(self, session_id):
+        with self.sessions_lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            raise GameError(f"Unknown session {session_id!r}")
+        session.used = time.monotonic()
+        return session
+
+    def drop_idle_sessions(self):
+        limit = time.monotonic() - SESSION_TIMEOUT_S
+        with self.sessions_lock:
+            for session_id in [key for key, session in self.sessions.items() if session.used < limit]:
+                del self.sessions[session_id]
+
+    def handle_request_message(self, request):
+        cmd = request.get("cmd")
+        if cmd == "new":
+            self.drop_idle_sessions()
+            session = GameSession(
+                request.get("rows", engine.ROW_COUNT),
+                request.get("cols", engine.COLUMN_COUNT),
+                request.get("think_time_ms", self.think_time_ms),
+            )
+            if request.get("computer_first"):
+                session.status = "computer_wait"
+                session.play_computer()  # Before the session is listed, a failure leaves nothing behind
+            with self.sessions_lock:
+                self.sessions[session.id] = session
+            with session.lock:
+                return session.state()
+        if cmd == "move":
+            session = self.session(request.get("session"))
+            with session.lock:
+                session.play_turn(request.get("col"))
+                return session.state()
+        if cmd == "state":
+            session = self.session(request.get("session"))
+            with session.lock:
+                return session.state()
+        if cmd == "close":
+            with self.sessions_lock:
+                if self.sessions.pop(request.get("session"), None) is None:
+                    raise GameError(f"Unknown session {request.get('session')!r}")
+            return {}
+        if cmd == "list":
+            with self.sessions_lock:
+                sessions = list(self.sessions.values())
+            return {"sessions": [{"session": session.id, "status": session.status} for session in sessions]}
+        raise GameError(f"Unknown command {cmd!r}")
+
+
+class GameRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if len(line) > MAX_LINE_BYTES:
+                self.reply({"ok": False, "error": "Request too long"})
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise GameError("Request must be a JSON object")
+                reply = {"ok": True, **self.server.handle_request_message(request)}
+            except (GameError, ValueError) as e:  # json.JSONDecodeError is a ValueError
+                reply = {"ok": False, "error": str(e)}
+            except Exception as e:
+                print(f"Error handling request: {e}")
+                reply = {"ok": False, "error": "Internal server error"}
+            self.reply(reply)
+
+    def reply(self, message):
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+
+
+# --------------------------------------------------
+# Client
+# --------------------------------------------------
+class GameClient:
+    def __init__(self, host=HOST, port=PORT, timeout=None):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile("rwb")
+
+    def request(self, cmd, **fields):
+        self.file.write(json.dumps({"cmd": cmd, **fields}).encode("utf-8") + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Game server closed the connection")
+        reply = json.loads(line)
+        if not reply.pop("ok"):
+            raise GameError(reply["error"])
+        return reply
+
+    def new_game(self, rows=None, cols=None, computer_first=False, think_time_ms=None):
+        fields = {"computer_first": computer_first}
+        for name, value in (("rows", rows), ("cols", cols), ("think_time_ms", think_time_ms)):
+            if value is not None:
+                fields[name] = value
+        return self.request("new", **fields)  # State of the new session
+
+    def move(self, session, col):
+        return self.request("move", session=session, col=col)
+
+    def state(self, session):
+        return self.request("state", session=session)
+
+    def close_session(self, session):
+        self.request("close", session=session)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Connect Four game server")
+    parser.add_argument('--host', default=HOST,
+                        help=f"Address to listen on (default: {HOST}).")
+    parser.add_argument('--port', default=PORT, type=int,
+                        help=f"Port to listen on (default: {PORT}).")
+    parser.add_argument('--think-time-ms', default=engine.THINK_TIME_MS, type=int,
+                        help=f"Default time budget per computer move (default: {engine.THINK_TIME_MS}).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with GameServer(args.host, args.port, args.think_time_ms) as server:
+        print(f"Game server listening on {args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    engine.shutdown_executor()
@@ -0,0 +1,239 @@
+import os
+import time
+import argparse
+import numpy as np
+
+# --------------------------------------------------
+# File format
+# --------------------------------------------------
+# Two append-only files of fixed-size little-endian records, each after a small
+# header (magic, version). moves.bin gets one record per move as it is played,
+# games.bin one index record per finished game pointing at the game's first
+# move record, so a game is a slice of the memory-mapped move records. Moves of
+# a game that never finished stay in moves.bin without an index record.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOVE_LOG_DIR = os.path.join(BASE_DIR, "data", "games")
+MOVES_FILE = "moves.bin"
+INDEX_FILE = "games.bin"
+VERSION = 1
+
+HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u4")])
+MOVES_MAGIC = b"C4ML"
+INDEX_MAGIC = b"C4MI"
+
+SIDES = ("player", "computer")  # Board pieces PLAYER and COMPUTER are the index + 1
+SOURCES = ("player", "tactical", "book", "cache", "ponder", "solver", "search", "parallel", "mcts")
+RESULTS = ("stopped", "player_win", "computer_win", "tie")
+
+MOVE_DTYPE = np.dtype([
+    ("game_id", "<u4"),
+    ("ply", "<u2"),
+    ("side", "u1"),  # Index into SIDES
+    ("col", "i1"),
+    ("time_ns", "<i8"),  # Wall clock when the move was played
+    ("think_ms", "<f4"),  # Time since the previous move, or the game start
+    ("source", "u1"),  # Index into SOURCES, "player" for player moves
+    ("depth", "u1"),
+    ("nodes", "<u8"),
+    ("playouts", "<u4"),
+    ("tt_hits", "<u8"),
+    ("engine_ms", "<f4"),
+], align=True)
+
+GAME_DTYPE = np.dtype([
+    ("game_id", "<u4"),
+    ("rows", "u1"),
+    ("cols", "u1"),
+    ("result", "u1"),  # Index into RESULTS
+    ("first_move", "<u8"),  # Record number of ply 0 in moves.bin
+    ("move_count", "<u2"),
+    ("started_ns", "<i8"),
+    ("ended_ns", "<i8"),
+], align=True)
+
+
+def _open_append(path, magic):
+    """Open a log file for appending, writing the header of a new file."""
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    f = open(path, "ab")
+    if new:
+        header = np.zeros((), HEADER_DTYPE)
+        header["magic"], header["version"] = magic, VERSION
+        f.write(header.tobytes())
+        f.flush()
+    else:
+        _check_header(path, magic)
+    return f
+
+
+def _check_header(path, magic):
+    header = np.fromfile(path, HEADER_DTYPE, count=1)
+    if not header.size or header[0]["magic"] != magic or header[0]["version"] != VERSION:
+        raise ValueError(f"'{path}' is not a move log file (version {VERSION})")
+
+
+def _map_records(path, magic, dtype):
+    if not os.path.exists(path):
+        return np.zeros(0, dtype)
+    _check_header(path, magic)
+    count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // dtype.itemsize
+    if not count:
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+
+def _truncate_torn(f, path, dtype):
+    size = os.path.getsize(path)
+    whole = HEADER_DTYPE.itemsize + (size - HEADER_DTYPE.itemsize) // dtype.itemsize * dtype.itemsize
+    if whole != size:
+        f.truncate(whole)  # A record cut short by a crash
+    return (whole - HEADER_DTYPE.itemsize) // dtype.itemsize
+
+
+class MoveLog:
+    """Writer: appends one fixed-size record per move, the index record when a game ends."""
+
+    def __init__(self, directory=MOVE_LOG_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.moves_path = os.path.join(directory, MOVES_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._moves = _open_append(self.moves_path, MOVES_MAGIC)
+        self._index = _open_append(self.index_path, INDEX_MAGIC)
+        self.move_records = _truncate_torn(self._moves, self.moves_path, MOVE_DTYPE)
+        _truncate_torn(self._index, self.index_path, GAME_DTYPE)
+        last_ids = [
+            int(records["game_id"][-1])
+            for records in (_map_records(self.moves_path, MOVES_MAGIC, MOVE_DTYPE),
+                            _map_records(self.index_path, INDEX_MAGIC, GAME_DTYPE))
+            if records.size
+        ]
+        self.next_game_id = max(last_ids, default=0) + 1
+        self.game = None  # Index record of the game being logged
+        self._last_ns = 0
+
+    def start_game(self, rows, cols):
+        game = np.zeros((), GAME_DTYPE)
+        game["game_id"] = self.next_game_id
+        game["rows"], game["cols"] = rows, cols
+        game["first_move"] = self.move_records
+        game["started_ns"] = self._last_ns = time.time_ns()
+        self.next_game_id += 1
+        self.game = game
+        return int(game["game_id"])
+
+    def append(self, side, col, stats=None):
+        now = time.time_ns()
+        record = np.zeros((), MOVE_DTYPE)
+        record["game_id"] = self.game["game_id"]
+        record["ply"] = self.game["move_count"]
+        record["side"] = SIDES.index(side)
+        record["col"] = col
+        record["time_ns"] = now
+        record["think_ms"] = (now - self._last_ns) / 1e6
+        if stats is not None:
+            record["source"] = SOURCES.index(stats.source) if stats.source in SOURCES else SOURCES.index("search")
+            record["depth"] = min(stats.depth, 255)
+            record["nodes"] = stats.nodes
+            record["playouts"] = stats.playouts
+            record["tt_hits"] = stats.tt_hits
+            record["engine_ms"] = stats.time_ms
+        self._moves.write(record.tobytes())
+        self._moves.flush()  # Readers and a crash see every played move
+        self.move_records += 1
+        self.game["move_count"] += 1
+        self._last_ns = now
+
+    def end_game(self, result):
+        self.game["result"] = RESULTS.index(result)
+        self.game["ended_ns"] = time.time_ns()
+        self._index.write(self.game.tobytes())
+        self._index.flush()
+        self.game = None
+
+    def close(self):
+        self._moves.close()
+        self._index.close()
+
+
+class MoveLogReader:
+    """Memory-mapped view of a move log: every move and every finished game as record arrays."""
+
+    def __init__(self, directory=MOVE_LOG_DIR):
+        self.moves = _map_records(os.path.join(directory, MOVES_FILE), MOVES_MAGIC, MOVE_DTYPE)
+        self.games = _map_records(os.path.join(directory, INDEX_FILE), INDEX_MAGIC, GAME_DTYPE)
+
+    def __len__(self):
+        return len(self.games)
+
+    def game_moves(self, game):
+        first = int(game["first_move"])
+        return self.moves[first:first + int(game["move_count"])]
+
+    def find(self, game_id):
+        position = int(np.searchsorted(self.games["game_id"], game_id))  # Game ids only grow
+        if position < len(self.games) and self.games[position]["game_id"] == game_id:
+            return self.games[position], self.game_moves(self.games[position])
+        return None  # (index record, move records) of game_id, or None
+
+    def iter_games(self, start=0, stop=None):
+        for game in self.games[start:stop]:
+            yield game, self.game_moves(game)  # Move records are views into the mapped file
+
+    def replay(self, game_id, plies=None):
+        found = self.find(game_id)
+        if found is None:
+            raise KeyError(f"Game {game_id} is not in the move log")
+        game, moves = found
+        board = np.zeros((int(game["rows"]), int(game["cols"])), dtype=np.uint8)
+        heights = np.zeros(int(game["cols"]), dtype=np.intp)
+        for side, col in zip(moves["side"][:plies], moves["col"][:plies]):
+            board[heights[col], col] = side + 1
+            heights[col] += 1
+        return board  # Row 0 at the bottom, after plies moves (all by default)
+
+    def summary(self):
+        games, moves = self.games, self.moves
+        engine = moves[moves["source"] != SOURCES.index("player")]
+        player = moves[moves["source"] == SOURCES.index("player")]
+        sources = np.bincount(engine["source"], minlength=len(SOURCES))
+        return {
+            "games": len(games),
+            "moves": len(moves),
+            "results": dict(zip(RESULTS, np.bincount(games["result"], minlength=len(RESULTS)).tolist())),
+            "mean_plies": float(games["move_count"].mean()) if len(games) else 0.0,
+            "player_think_ms": float(np.median(player["think_ms"])) if len(player) else 0.0,
+            "engine_ms_by_source": {
+                SOURCES[source]: round(float(engine["engine_ms"][engine["source"] == source].mean()), 1)
+                for source in np.flatnonzero(sources)
+            },
+        }
+
+    def close(self):
+        self.moves = self.games = None  # The maps close once no returned view is left
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Inspect the binary move log")
+    parser.add_argument('--dir', default=MOVE_LOG_DIR,
+                        help=f"Move log directory (default: {MOVE_LOG_DIR}).")
+    parser.add_argument('--replay', default=None, type=int,
+                        help="Print the moves and final board of this game id.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    reader = MoveLogReader(args.dir)
+    if args.replay is not None:
+        found = reader.find(args.replay)
+        if found is None:
+            raise SystemExit(f"Game {args.replay} is not in the move log")
+        game, moves = found
+        print(f"Game {args.replay}: {game['rows']}x{game['cols']}, {RESULTS[game['result']]}")
+        for move in moves:
+            print(f"  {move['ply']:>3} {SIDES[move['side']]:<8} col {move['col']}  "
+                  f"{SOURCES[move['source']]:<8} depth {move['depth']:>2}  {move['think_ms']:8.1f} ms")
+        print(np.flip(reader.replay(args.replay), 0))
+    else:
+        for name, value in reader.summary().items():
+            print(f"{name}: {value}")
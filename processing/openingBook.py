@@ -0,0 +1,178 @@
+import os
+import mmap
+import time
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# --------------------------------------------------
+# File format
+# --------------------------------------------------
+# Header: magic, version, rows, cols, max plies, record count.
+# Records: position key, score, best column; sorted by key so the reader can
+# binary search the memory-mapped file without loading it. Only the smaller key
+# of a position and its mirror image is stored, the column is mirrored on lookup.
+MAGIC = b"C4BK"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBHI")
+RECORD = struct.Struct("<QiB3x")
+
+DEFAULT_PLIES = 6
+DEFAULT_DEPTH = 12
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Opening book '{path}' is empty")
+        magic, version, self.rows, self.cols, self.max_plies, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"'{path}' is not an opening book (version {VERSION})")
+
+    @classmethod
+    def open(cls, path):
+        if not os.path.exists(path):
+            return None
+        return cls(path)  # None when the file does not exist
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, index):
+        return RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+
+    def find(self, key):
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            record_key, score, col = self._record(middle)
+            if record_key == key:
+                return score, col
+            if record_key < key:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None  # (score, column) stored for key, or None
+
+    def lookup(self, position):
+        if (position.rows, position.cols) != (self.rows, self.cols) or position.moves > self.max_plies:
+            return None
+        key = position.key()
+        mirror_key = position.mirrored().key()
+        entry = self.find(min(key, mirror_key))
+        if entry is None:
+            return None
+        col = entry[1]
+        return col if key <= mirror_key else self.cols - 1 - col  # Book move for the computer
+
+
+# --------------------------------------------------
+# Offline generator
+# --------------------------------------------------
+def canonical(position):
+    mirror = position.mirrored()
+    if mirror.key() < position.key():
+        return mirror
+    return position  # Orientation with the smaller key
+
+
+def enumerate_positions(plies, rows, cols):
+    from processing import connectFour as engine
+
+    positions = {}
+    for first in (engine.PLAYER, engine.COMPUTER):
+        frontier = [engine.create_board(rows, cols)]
+        for ply in range(plies + 1):
+            piece = first if ply % 2 == 0 else engine.PLAYER + engine.COMPUTER - first
+            children = {}
+            for position in frontier:
+                if piece == engine.COMPUTER:
+                    positions.setdefault(position.key(), position)
+                if ply == plies:
+                    continue
+                for col in range(cols):
+                    if not engine.is_valid_location(position, col):
+                        continue
+                    child = position.copy()
+                    child.play(col, piece)
+                    if engine.check_win(child, piece):
+                        continue
+                    child = canonical(child)
+                    children.setdefault(child.key(), child)
+            frontier = list(children.values())
+    return list(positions.values())  # Canonical positions with the computer to move
+
+
+def _search_entry(args):
+    from processing import connectFour as engine
+
+    position, depth, time_budget_ms = args
+    table = engine.TranspositionTable(max_mb=16)
+    score, col = engine.search(position, depth, time_budget_ms, table)
+    return position.key(), int(score), col
+
+
+def write_book(path, entries, rows, cols, plies):
+    entries = sorted(entries)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, plies, len(entries)))
+        for key, score, col in entries:
+            f.write(RECORD.pack(key, score, col))
+    os.replace(temp_path, path)  # Readers never see a half-written book
+
+
+def generate_book(path, plies=DEFAULT_PLIES, depth=DEFAULT_DEPTH, time_budget_ms=None, workers=None,
+                  rows=None, cols=None):
+    from processing import connectFour as engine
+
+    rows = rows or engine.ROW_COUNT
+    cols = cols or engine.COLUMN_COUNT
+    if cols * (rows + 1) > 64:
+        raise ValueError(f"{rows}x{cols} position keys do not fit the 64 bit book records")
+
+    positions = enumerate_positions(plies, rows, cols)
+    print(f"Opening book: searching {len(positions)} positions up to {plies} plies")
+    start = time.perf_counter()
+    jobs = [(position, depth, time_budget_ms) for position in positions]
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for i, entry in enumerate(executor.map(_search_entry, jobs, chunksize=8), start=1):
+            entries.append(entry)
+            if i % 500 == 0:
+                print(f"  {i}/{len(jobs)} positions, {time.perf_counter() - start:.0f}s")
+    write_book(path, entries, rows, cols, plies)
+    print(f"Opening book with {len(entries)} entries written to '{path}'")
+
+
+def parse_args():
+    from processing.connectFour import OPENING_BOOK_PATH
+
+    parser = argparse.ArgumentParser(description="Generate the Connect Four opening book")
+    parser.add_argument('--output', default=OPENING_BOOK_PATH,
+                        help="Book file to write (default: data/opening_book.bin).")
+    parser.add_argument('--plies', default=DEFAULT_PLIES, type=int,
+                        help=f"Cover all positions up to this many plies (default: {DEFAULT_PLIES}).")
+    parser.add_argument('--depth', default=DEFAULT_DEPTH, type=int,
+                        help=f"Search depth per position (default: {DEFAULT_DEPTH}).")
+    parser.add_argument('--time-budget-ms', default=None, type=int,
+                        help="Search each position by time instead of a fixed depth.")
+    parser.add_argument('--workers', default=None, type=int,
+                        help="Worker processes (default: one per CPU).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    depth = None if args.time_budget_ms else args.depth
+    generate_book(args.output, args.plies, depth, args.time_budget_ms, args.workers)
@@ -0,0 +1,90 @@
+import time
+import sqlite3
+
+# --------------------------------------------------
+# Configuration
+# --------------------------------------------------
+MAX_ENTRIES = 500000  # Least recently used positions are evicted beyond this
+EVICT_FRACTION = 0.1  # Share of MAX_ENTRIES removed per eviction, so it runs rarely
+EVICT_CHECK_INTERVAL = 256  # Stores between size checks
+BUSY_TIMEOUT_S = 5.0  # How long a process waits for another one's write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    key TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    best_col INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS positions_used ON positions (used);
+"""
+
+
+class SearchCache:
+    """Search results shared by all game processes through one SQLite file."""
+
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._stores = 0
+        # Autocommit; WAL lets readers work while another process writes
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def position_key(position):
+        return f"{position.rows}x{position.cols}:{position.key()}"  # Computer to move is implied
+
+    def get(self, position, min_depth):
+        """Return (score, best_col) when the position was searched at least min_depth deep."""
+        key = self.position_key(position)
+        try:
+            row = self.conn.execute(
+                "SELECT depth, score, best_col FROM positions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] < min_depth:
+                return None
+            self.conn.execute("UPDATE positions SET used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"Error reading search cache: {e}")
+            return None
+        return row[1], row[2]
+
+    def put(self, position, depth, score, best_col):
+        """Store a search result unless a deeper one is already cached."""
+        try:
+            self.conn.execute(
+                """
+                INSERT INTO positions (key, depth, score, best_col, used) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    depth = excluded.depth, score = excluded.score,
+                    best_col = excluded.best_col, used = excluded.used
+                WHERE excluded.depth >= positions.depth
+                """,
+                (self.position_key(position), depth, int(score), best_col, time.time()),
+            )
+            self._stores += 1
+            if self._stores % EVICT_CHECK_INTERVAL == 0:
+                self.evict()
+        except sqlite3.Error as e:
+            print(f"Error writing search cache: {e}")
+
+    def evict(self):
+        """Drop the least recently used entries once the cache is over its limit."""
+        count = self.conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - self.max_entries + int(self.max_entries * EVICT_FRACTION)
+        self.conn.execute(
+            "DELETE FROM positions WHERE key IN (SELECT key FROM positions ORDER BY used LIMIT ?)",
+            (excess,),
+        )
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
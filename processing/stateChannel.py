@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import socket
+import argparse
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from processing.boardConfig import MAX_SIZE
+
+# --------------------------------------------------
+# Layout
+# --------------------------------------------------
+# A channel is one named shared-memory block with a single writer (its owner).
+# The header carries a sequence counter that is odd while the owner writes
+# (seqlock), the owner's command port, and the UDP ports of subscribers that
+# get the new sequence number after every publish. The typed record follows.
+MAX_ROWS = MAX_SIZE  # check_board_size keeps every board within the record
+MAX_COLS = MAX_SIZE
+MAX_CELLS = MAX_ROWS * MAX_COLS
+MAX_SUBSCRIBERS = 16
+HOST = "127.0.0.1"
+READ_RETRIES = 1000
+
+HEADER_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("closed", "u1"),  # Set when the owner shuts the channel down
+    ("command_port", "<u2"),
+    ("subscribers", "<u2", (MAX_SUBSCRIBERS,)),
+], align=True)
+
+GAME_CHANNEL = "c4_game_state"
+GAME_STATUSES = ("player_wait", "computer_wait", "player_win", "computer_win", "tie", "stopped")
+SIDES = ("player", "computer")
+GAME_DTYPE = np.dtype([
+    ("rows", "u1"),
+    ("cols", "u1"),
+    ("status", "u1"),  # Index into GAME_STATUSES
+    ("player_col", "i1"),
+    ("computer_col", "i1"),
+    ("stop", "u1"),
+    ("start", "u1"),
+    ("move_count", "<u2"),
+    ("move_sides", "u1", (MAX_CELLS,)),  # Index into SIDES
+    ("move_cols", "i1", (MAX_CELLS,)),
+    ("board", "u1", (MAX_ROWS, MAX_COLS)),  # Row 0 at the bottom, as Position.tolist()
+], align=True)
+
+DETECTION_CHANNEL = "c4_detection"
+DETECTION_DTYPE = np.dtype([
+    ("rows", "u1"),
+    ("cols", "u1"),
+    ("cells", "S1", (MAX_ROWS, MAX_COLS)),  # Validated OCR text per cell, top row first
+], align=True)
+
+
+class ChannelClosed(Exception):
+    pass
+
+
+class StateChannel:
+    """Typed shared-memory state record with a seqlock and change notifications."""
+
+    def __init__(self, name, dtype, create=False):
+        self.name = name
+        self.dtype = dtype
+        self.owner = create
+        self._commands = None
+        size = HEADER_DTYPE.itemsize + dtype.itemsize
+        if create:
+            try:
+                old = shared_memory.SharedMemory(name=name)  # Left behind by a crashed owner
+                old.close()
+                old.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            if os.name == "posix":
+                resource_tracker.unregister(self.shm._name, "shared_memory")  # Only the owner unlinks the block
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=self.shm.buf)
+        self.record = np.ndarray((), dtype, buffer=self.shm.buf, offset=HEADER_DTYPE.itemsize)
+        if create:
+            self.header[()] = np.zeros((), HEADER_DTYPE)
+            self.record[()] = np.zeros((), dtype)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    @classmethod
+    def open(cls, name, dtype):
+        try:
+            return cls(name, dtype)
+        except FileNotFoundError:
+            return None  # None while the owner has not created the channel
+
+    # ----------------------------------------------
+    # Writer
+    # ----------------------------------------------
+    def publish(self, **fields):
+        header = self.header
+        header["seq"] += 1  # Odd: readers retry
+        for name, value in fields.items():
+            self.record[name] = value
+        header["seq"] += 1
+        self._notify(int(header["seq"]))
+
+    def _notify(self, seq):
+        message = seq.to_bytes(8, "little")
+        for port in self.header["subscribers"]:
+            if port:
+                try:
+                    self._socket.sendto(message, (HOST, int(port)))
+                except OSError:
+                    pass  # A subscriber that went away without unsubscribing
+
+    def listen_commands(self):
+        self._commands = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._commands.bind((HOST, 0))
+        self.header["command_port"] = self._commands.getsockname()[1]
+
+    def receive_command(self, timeout=None):
+        self._commands.settimeout(timeout)
+        try:
+            data, _ = self._commands.recvfrom(65536)
+        except socket.timeout:
+            return None
+        try:
+            command = json.loads(data)
+        except ValueError:
+            print(f"Ignoring malformed command: {data!r}")
+            return None
+        return command if isinstance(command, dict) else None  # Command dict, None on timeout
+
+    # ----------------------------------------------
+    # Readers
+    # ----------------------------------------------
+    @property
+    def seq(self):
+        return int(self.header["seq"])
+
+    @property
+    def closed(self):
+        return bool(self.header["closed"])
+
+    def read(self):
+        for _ in range(READ_RETRIES):
+            before = int(self.header["seq"])
+            if before & 1:
+                continue
+            record = self.record.copy()
+            if int(self.header["seq"]) == before:
+                return before, record  # Consistent copy and its sequence number
+        raise RuntimeError(f"Channel '{self.name}' is being written too often to read")
+
+    def send_command(self, **fields):
+        port = int(self.header["command_port"])
+        if not port:
+            raise ChannelClosed(f"Channel '{self.name}' takes no commands")
+        self._socket.sendto(json.dumps(fields).encode("utf-8"), (HOST, port))
+
+    def subscribe(self):
+        return Subscription(self)
+
+    def close(self):
+        if self.owner:
+            self.header["closed"] = 1
+            self.header["command_port"] = 0
+            self._notify(self.seq)
+        if self._commands is not None:
+            self._commands.close()
+        self._socket.close()
+        del self.header, self.record  # Release the buffer exports before closing the block
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class Subscription:
+    def __init__(self, channel):
+        self.channel = channel
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((HOST, 0))
+        self.port = self.socket.getsockname()[1]
+        self.seen = None
+        subscribers = channel.header["subscribers"]
+        free = np.flatnonzero(subscribers == 0)
+        if not free.size:
+            self.socket.close()
+            raise RuntimeError(f"Channel '{channel.name}' has no free subscriber slot")
+        self.slot = int(free[0])
+        subscribers[self.slot] = self.port
+
+    def fileno(self):
+        return self.socket.fileno()  # For select() next to other sockets
+
+    def wait(self, timeout=None):
+        """Return (seq, record) once the state changed since the last call, None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.channel.closed:
+                raise ChannelClosed(f"Channel '{self.channel.name}' was closed")
+            if self.seen is None or self.channel.seq != self.seen:
+                seq, record = self.channel.read()
+                self.seen = seq
+                return seq, record
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            self.socket.settimeout(remaining)
+            try:
+                self.socket.recv(8)  # Only a wake-up, the block holds the state
+            except socket.timeout:
+                return None
+
+    def close(self):
+        subscribers = self.channel.header["subscribers"]
+        if subscribers[self.slot] == self.port:
+            subscribers[self.slot] = 0
+        self.socket.close()
+
+
+# --------------------------------------------------
+# Game state records
+# --------------------------------------------------
+def game_state_fields(player_col, computer_col, status, stop, moves, board_state, start=1):
+    rows, cols = len(board_state), len(board_state[0])
+    board = np.zeros((MAX_ROWS, MAX_COLS), dtype=np.uint8)
+    board[:rows, :cols] = board_state
+    sides = np.zeros(MAX_CELLS, dtype=np.uint8)
+    columns = np.zeros(MAX_CELLS, dtype=np.int8)
+    sides[:len(moves)] = [SIDES.index(side) for side, _ in moves]
+    columns[:len(moves)] = [col for _, col in moves]
+    return {
+        "rows": rows,
+        "cols": cols,
+        "status": GAME_STATUSES.index(status),
+        "player_col": player_col,
+        "computer_col": computer_col,
+        "stop": stop,
+        "start": start,
+        "move_count": len(moves),
+        "move_sides": sides,
+        "move_cols": columns,
+        "board": board,
+    }  # publish() fields of a game state, board_state with row 0 at the bottom
+
+
+def game_state_dict(record):
+    rows, cols, count = int(record["rows"]), int(record["cols"]), int(record["move_count"])
+    return {
+        "player_col": int(record["player_col"]),
+        "computer_col": int(record["computer_col"]),
+        "status": GAME_STATUSES[record["status"]],
+        "stop": int(record["stop"]),
+        "start": int(record["start"]),
+        "moves": [(SIDES[side], int(col)) for side, col in zip(record["move_sides"][:count], record["move_cols"][:count])],
+        "board_state": record["board"][:rows, :cols].tolist(),
+    }  # Plain Python values of a game state record
+
+
+def detection_fields(cells):
+    rows, cols = len(cells), len(cells[0]) if cells else 0
+    grid = np.zeros((MAX_ROWS, MAX_COLS), dtype="S1")
+    for row, texts in enumerate(cells):
+        grid[row, :len(texts)] = [text.encode("ascii")[:1] for text in texts]
+    return {"rows": rows, "cols": cols, "cells": grid}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Send a command to a running game")
+    parser.add_argument('--move', default=None, type=int,
+                        help="Play the player's move in this 0-based column.")
+    parser.add_argument('--stop', action='store_true',
+                        help="Stop the game.")
+    parser.add_argument('--show', action='store_true',
+                        help="Print every state change until the game ends.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    channel = StateChannel.open(GAME_CHANNEL, GAME_DTYPE)
+    if channel is None:
+        raise SystemExit("No game is running")
+    if args.move is not None:
+        channel.send_command(player_col=args.move)
+    if args.stop:
+        channel.send_command(stop=1)
+    if args.show:
+        subscription = channel.subscribe()
+        try:
+            while True:
+                _, record = subscription.wait()
+                print(game_state_dict(record))
+        except (ChannelClosed, KeyboardInterrupt):
+            pass
+        finally:
+            subscription.close()
+    channel.close()
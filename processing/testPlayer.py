@@ -1,10 +1,5 @@
 import numpy as np
-
-ROW_COUNT = 6
-COLUMN_COUNT = 7
-EMPTY = 0
-PLAYER = 1  # Player is 'X'
-COMPUTER = 2  # Computer is 'O'
+from processing.connectFour import ROW_COUNT, COLUMN_COUNT, EMPTY, PLAYER, COMPUTER  # Player is 'X', computer is 'O'
 
 def print_board(board):
     print(np.flip(board, 0))
@@ -62,13 +57,13 @@ def play_game():
             valid_move = False
             while not valid_move:
                 try:
-                    col = int(input(f"{player_name}, choose a column (1-7): ")) - 1
+                    col = int(input(f"{player_name}, choose a column (1-{COLUMN_COUNT}): ")) - 1
                     if 0 <= col < COLUMN_COUNT and is_valid_location(board, col):
                         valid_move = True
                     else:
                         print("Invalid move! Try again.")
                 except ValueError:
-                    print("Please enter a number between 1 and 7.")
+                    print(f"Please enter a number between 1 and {COLUMN_COUNT}.")
             
             row = get_next_available_row(board, col)
             drop_piece(board, row, col, player)
@@ -82,9 +77,9 @@ def play_game():
             print("Computer is thinking...")
 
             # Import the computer's move function from Program 1
-            from connectFour import get_computer_move_response
+            from processing.connectFour import get_computer_move
             
-            col = get_computer_move_response(board, 4)  # Depth is set to 4 for better decision-making
+            col = get_computer_move(board, 4)  # Depth is set to 4 for better decision-making
             row = get_next_available_row(board, col)
             drop_piece(board, row, col, COMPUTER)
 
@@ -0,0 +1,305 @@
+import os
+import json
+import math
+import time
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+from processing import connectFour as engine
+
+# --------------------------------------------------
+# Engine configurations
+# --------------------------------------------------
+# An engine is a dict with a name and any of: engine (alphabeta or mcts), depth,
+# time_budget_ms, weights (evaluate_window terms, see EVAL_WEIGHTS) and ordering
+# (MoveOrdering flags).
+# Book and search cache are never used, they hold results of the default engine.
+ENGINE_PRESETS = {
+    "depth4": {"depth": 4},
+    "depth6": {"depth": 6},
+    "depth8": {"depth": 8},
+    "time100": {"time_budget_ms": 100},
+    "time250": {"time_budget_ms": 250},
+    "mcts100": {"engine": "mcts", "time_budget_ms": 100},
+    "mcts250": {"engine": "mcts", "time_budget_ms": 250},
+    "no_ordering": {"depth": 6, "ordering": {"center": False, "hash_move": False, "killers": False,
+                                             "history": False}},
+    "aggressive": {"depth": 6, "weights": {"three": 10, "two": 3}},
+    "defensive": {"depth": 6, "weights": {"opponent_three": -10, "opponent_two": -3}},
+}
+ENGINE_KEYS = {"name", "engine", "depth", "time_budget_ms", "weights", "ordering"}
+
+DEFAULT_GAMES = 100  # Games per pairing
+DEFAULT_OPENING_PLIES = 4
+GAME_TT_MAX_MB = 8  # Table of each engine in each game
+CHUNKSIZE = 4
+TOURNAMENT_DIR = os.path.join(engine.BASE_DIR, "data", "tournaments")
+
+
+def check_engine(config):
+    unknown = set(config) - ENGINE_KEYS
+    if unknown:
+        raise ValueError(f"Engine '{config.get('name')}' has unknown settings: {', '.join(sorted(unknown))}")
+    if config.get("engine", "alphabeta") not in engine.ENGINES:
+        raise ValueError(f"Engine '{config.get('name')}' has unknown engine {config['engine']!r}")
+    if config.get("engine") != "mcts" and config.get("depth") is None and config.get("time_budget_ms") is None:
+        raise ValueError(f"Engine '{config.get('name')}' needs a depth or a time_budget_ms")
+    engine.get_evaluation(config.get("weights"))  # Raises on unknown weights
+    engine.MoveOrdering(**config.get("ordering", {}))
+    return config
+
+
+def load_engines(names=(), path=None):
+    engines = [dict(ENGINE_PRESETS[name], name=name) for name in names]
+    if path is not None:
+        with open(path) as f:
+            engines.extend(json.load(f))
+    if len(engines) < 2:
+        raise ValueError("A tournament needs at least two engines")
+    if len({config["name"] for config in engines}) != len(engines):
+        raise ValueError("Engine names must be unique")
+    return [check_engine(config) for config in engines]
+
+
+# --------------------------------------------------
+# Games
+# --------------------------------------------------
+def random_openings(count, plies, rows, cols, seed=0):
+    rng = random.Random(seed)
+    openings = set()
+    attempts = 0
+    while len(openings) < count and attempts < count * 100:
+        attempts += 1
+        position = engine.create_board(rows, cols)
+        moves = []
+        piece = engine.PLAYER
+        for _ in range(plies):
+            col = rng.choice([col for col in range(cols) if engine.is_valid_location(position, col)])
+            position.play(col, piece)
+            piece = engine.PLAYER + engine.COMPUTER - piece
+            if engine.check_win(position, engine.PLAYER + engine.COMPUTER - piece) or \
+                    engine.tactical_move(position, piece) is not None:
+                break  # Decided or forced openings say nothing about the engines
+            moves.append(col)
+        else:
+            openings.add(tuple(moves))
+    return sorted(openings)  # Distinct quiet openings, the same for every run
+
+
+class _Side:
+    def __init__(self, config, rows, cols):
+        self.config = config
+        # Every side sees the board from its own view: its stones are COMPUTER
+        self.position = engine.create_board(rows, cols, engine.get_evaluation(config.get("weights")))
+        self.table = engine.TranspositionTable(GAME_TT_MAX_MB)
+        self.ordering = engine.MoveOrdering(**config.get("ordering", {}))
+        self.time_ms = 0.0
+        self.moves = 0
+        self.depth = 0
+
+    def move(self):
+        col, stats = engine.get_computer_move(
+            self.position, self.config.get("depth"), self.config.get("time_budget_ms"), self.table, self.ordering,
+            use_book=False, workers=1, use_cache=False, return_stats=True,
+            engine=self.config.get("engine", "alphabeta"),
+        )
+        self.time_ms += stats.time_ms
+        self.moves += 1
+        self.depth += stats.depth
+        return col
+
+
+def play_game(args):
+    first, second, opening, rows, cols = args
+    sides = [_Side(first, rows, cols), _Side(second, rows, cols)]
+    moves = list(opening)
+    for ply, col in enumerate(opening):
+        mover = ply % 2
+        sides[mover].position.play(col, engine.COMPUTER)
+        sides[1 - mover].position.play(col, engine.PLAYER)
+    winner = None
+    while not sides[0].position.is_full():
+        mover = len(moves) % 2
+        col = sides[mover].move()
+        moves.append(col)
+        sides[mover].position.play(col, engine.COMPUTER)
+        sides[1 - mover].position.play(col, engine.PLAYER)
+        if engine.check_win(sides[mover].position, engine.COMPUTER):
+            winner = mover
+            break
+    return {
+        "first": first["name"],
+        "second": second["name"],
+        "winner": None if winner is None else sides[winner].config["name"],
+        "moves": moves,
+        "time_ms": [side.time_ms for side in sides],
+        "engine_moves": [side.moves for side in sides],
+        "depth": [side.depth for side in sides],
+    }  # One game, first moves first from the opening on
+
+
+# --------------------------------------------------
+# Statistics
+# --------------------------------------------------
+def elo_from_score(score):
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_estimate(wins, losses, draws, z=1.96):
+    games = wins + losses + draws
+    if not games:
+        return None, None, None
+    score = (wins + 0.5 * draws) / games
+    # Standard error of the mean per game result (1, 0.5, 0)
+    variance = (wins + 0.25 * draws) / games - score ** 2
+    error = z * math.sqrt(max(variance, 0) / games)
+    return elo_from_score(score), elo_from_score(score - error), elo_from_score(score + error)  # Elo and 95% interval
+
+
+def summarize(engines, games):
+    names = [config["name"] for config in engines]
+    records = {name: {"wins": 0, "losses": 0, "draws": 0, "time_ms": 0.0, "moves": 0, "depth": 0} for name in names}
+    pairs = {}
+    for game in games:
+        players = (game["first"], game["second"])
+        for index, name in enumerate(players):
+            record = records[name]
+            record["time_ms"] += game["time_ms"][index]
+            record["moves"] += game["engine_moves"][index]
+            record["depth"] += game["depth"][index]
+            if game["winner"] is None:
+                record["draws"] += 1
+            elif game["winner"] == name:
+                record["wins"] += 1
+            else:
+                record["losses"] += 1
+        pair = pairs.setdefault(tuple(sorted(players, key=names.index)), {"wins": 0, "losses": 0, "draws": 0})
+        if game["winner"] is None:
+            pair["draws"] += 1
+        elif game["winner"] == min(players, key=names.index):
+            pair["wins"] += 1
+        else:
+            pair["losses"] += 1
+
+    summary = {"engines": {}, "pairs": {}}
+    for config in engines:
+        record = records[config["name"]]
+        played = record["wins"] + record["losses"] + record["draws"]
+        elo, low, high = elo_estimate(record["wins"], record["losses"], record["draws"])
+        summary["engines"][config["name"]] = {
+            "config": config,
+            "games": played,
+            "wins": record["wins"],
+            "losses": record["losses"],
+            "draws": record["draws"],
+            "win_rate": round(record["wins"] / played, 4) if played else None,
+            "elo": elo,  # Against the rest of the field
+            "elo_low": low,
+            "elo_high": high,
+            "mean_move_ms": round(record["time_ms"] / record["moves"], 3) if record["moves"] else None,
+            "mean_depth": round(record["depth"] / record["moves"], 2) if record["moves"] else None,
+        }
+    for (first, second), pair in pairs.items():
+        elo, low, high = elo_estimate(pair["wins"], pair["losses"], pair["draws"])
+        summary["pairs"][f"{first} vs {second}"] = dict(pair, elo=elo, elo_low=low, elo_high=high)  # For the first
+    return summary
+
+
+# --------------------------------------------------
+# Running
+# --------------------------------------------------
+def run_tournament(engines, games=DEFAULT_GAMES, opening_plies=DEFAULT_OPENING_PLIES, workers=None,
+                   rows=None, cols=None, seed=0):
+    rows = rows or engine.ROW_COUNT
+    cols = cols or engine.COLUMN_COUNT
+    # Every opening is played twice per pairing with the colors swapped
+    openings = random_openings((games + 1) // 2, opening_plies, rows, cols, seed)
+    jobs = []
+    for first, second in itertools.combinations(engines, 2):
+        for opening in openings:
+            jobs.append((first, second, opening, rows, cols))
+            jobs.append((second, first, opening, rows, cols))
+    print(f"Tournament: {len(engines)} engines, {len(jobs)} games on {rows}x{cols}")
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for i, game in enumerate(executor.map(play_game, jobs, chunksize=CHUNKSIZE), start=1):
+            results.append(game)
+            if i % 100 == 0:
+                print(f"  {i}/{len(jobs)} games, {time.perf_counter() - start:.0f}s")
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"games": games, "opening_plies": opening_plies, "rows": rows, "cols": cols, "seed": seed},
+        "summary": summarize(engines, results),
+        "games": results,
+    }
+
+
+# --------------------------------------------------
+# Reporting
+# --------------------------------------------------
+def _elo_text(elo, low, high):
+    if elo is None:
+        return "-"
+    return f"{elo:+.0f} [{low:+.0f}, {high:+.0f}]"
+
+
+def print_report(report):
+    summary = report["summary"]
+    print(f"Tournament {report['timestamp']}  {report['settings']}")
+    print(f"  {'engine':<14}{'games':>7}{'wins':>7}{'losses':>8}{'draws':>7}{'win %':>8}{'move ms':>10}"
+          f"{'depth':>7}  elo vs field (95%)")
+    for name, data in summary["engines"].items():
+        print(f"  {name:<14}{data['games']:>7}{data['wins']:>7}{data['losses']:>8}{data['draws']:>7}"
+              f"{100 * (data['win_rate'] or 0):>8.1f}{data['mean_move_ms'] or 0:>10.1f}{data['mean_depth'] or 0:>7}"
+              f"  {_elo_text(data['elo'], data['elo_low'], data['elo_high'])}")
+    for name, data in summary["pairs"].items():
+        print(f"  {name:<30} +{data['wins']} -{data['losses']} ={data['draws']}"
+              f"  elo {_elo_text(data['elo'], data['elo_low'], data['elo_high'])}")
+
+
+def save_report(report, path=None):
+    if path is None:
+        os.makedirs(TOURNAMENT_DIR, exist_ok=True)
+        path = os.path.join(TOURNAMENT_DIR, f"tournament_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)  # Infinite Elo is written as Infinity
+    print(f"Results written to '{path}'")
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Connect Four engine self-play tournament")
+    parser.add_argument('--engines', nargs='*', default=["depth4", "depth6"], choices=list(ENGINE_PRESETS),
+                        help="Preset engines to enter (default: depth4 depth6).")
+    parser.add_argument('--config', default=None,
+                        help="JSON file with a list of further engine configurations.")
+    parser.add_argument('--games', default=DEFAULT_GAMES, type=int,
+                        help=f"Games per pairing (default: {DEFAULT_GAMES}).")
+    parser.add_argument('--opening-plies', default=DEFAULT_OPENING_PLIES, type=int,
+                        help=f"Random plies played before the engines take over (default: {DEFAULT_OPENING_PLIES}).")
+    parser.add_argument('--workers', default=None, type=int,
+                        help="Worker processes (default: one per CPU).")
+    parser.add_argument('--rows', default=None, type=int,
+                        help="Board rows (default from config.yaml).")
+    parser.add_argument('--cols', default=None, type=int,
+                        help="Board columns (default from config.yaml).")
+    parser.add_argument('--seed', default=0, type=int,
+                        help="Seed of the random openings (default: 0).")
+    parser.add_argument('--output', default=None,
+                        help="JSON results file (default: data/tournaments/tournament_<time>.json).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    engines = load_engines(args.engines, args.config)
+    report = run_tournament(engines, args.games, args.opening_plies, args.workers, args.rows, args.cols, args.seed)
+    print_report(report)
+    save_report(report, args.output)
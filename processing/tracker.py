@@ -1,23 +1,28 @@
 import os
 import re
 import sys
-import time
+import json
 import signal
 import xml.etree.ElementTree as ET
 from paddleocr import TextRecognition
+from processing.boardConfig import load_board_size
+from processing.stateChannel import StateChannel, DETECTION_CHANNEL, DETECTION_DTYPE, detection_fields
+from processing.fileWatch import FileWatcher, atomic_path
 
 # --------------------------------------------------
 # Stop handling
 # --------------------------------------------------
 running = True
 XML_FILE = './processing/board_detection.xml'
+XML_EXPORT = False  # Also write every detection to XML_FILE, subscribers use the detection channel
 
 def write_xml(board_state):
     try:
         tree = ET.parse(XML_FILE)
         root = tree.getroot()
         root.find('board_state').text = str(board_state)
-        tree.write(XML_FILE)
+        with atomic_path(XML_FILE) as temp_path:
+            tree.write(temp_path)
     except Exception as e:
         print(f"Error writing XML: {e}")  # Write updated game status to XML
 
@@ -33,14 +38,16 @@ def initialize_xml():
         board_state = ET.SubElement(root, "board_state")
         board_state.text = "[]"
         tree = ET.ElementTree(root)
-        tree.write(XML_FILE)
+        with atomic_path(XML_FILE) as temp_path:
+            tree.write(temp_path)
         print(f"XML file '{XML_FILE}' initialized.")
     else:
         root = ET.Element("detection")
         board_state = ET.SubElement(root, "board_state")
         board_state.text = "[]"
         tree = ET.ElementTree(root)
-        tree.write(XML_FILE)
+        with atomic_path(XML_FILE) as temp_path:
+            tree.write(temp_path)
         print(f"XML file '{XML_FILE}' reset.")  # Initialize or reset XML file
 
 signal.signal(signal.SIGTERM, handle_stop)
@@ -52,6 +59,9 @@ signal.signal(signal.SIGINT, handle_stop)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 image_folder = os.path.join(DATA_DIR, "output", "cells")
+cells_done_path = os.path.join(DATA_DIR, "output", "cells.done")  # Replaced by detection after every cell set
+WAIT_TIMEOUT_S = 1.0  # Upper bound for noticing a stop request while idle
+rows, cols = load_board_size()
 
 # --------------------------------------------------
 # Initialize PaddleOCR
@@ -76,15 +86,32 @@ def validate_text(text):
 # --------------------------------------------------
 # Infinite processing loop
 # --------------------------------------------------
-initialize_xml()
+if XML_EXPORT:
+    initialize_xml()
+channel = StateChannel(DETECTION_CHANNEL, DETECTION_DTYPE, create=True)
+
+watcher = FileWatcher([cells_done_path])
+changed = os.path.exists(cells_done_path)
 
 while running:
+    if not changed:
+        changed = watcher.wait(WAIT_TIMEOUT_S)
+        continue
+    changed = False
+
+    try:
+        with open(cells_done_path, encoding="utf-8") as f:
+            cell_count = json.load(f)["cells"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading cell stamp: {e}")
+        continue
+
     detected_texts = []
 
     image_files = sorted(
         [f for f in os.listdir(image_folder) if f.endswith(('.png', '.jpg', '.jpeg'))],
         key=extract_numeric
-    )
+    )[:cell_count]  # Cells beyond the stamped count are left over from an earlier detection
 
     for filename in image_files:
         if not running:
@@ -109,12 +136,11 @@ while running:
                     'score': result.get('rec_score', 0.0),
                 })
     
-    detected_texts = detected_texts[:42]
+    detected_texts = detected_texts[:rows * cols]
     
-    if (len(detected_texts) < 42):
+    if (len(detected_texts) < rows * cols):
         print("Detection faild: not enough cells")
     
-    rows, cols = 6, 7
     detected_texts_2d = []
 
     for i in range(0, len(detected_texts), cols):
@@ -129,10 +155,12 @@ while running:
     for row in detected_texts_2d:
         print(row)
 
-    write_xml(detected_texts_2d)
-
-    # Preventing overload
-    time.sleep(0.5)
+    if detected_texts_2d:
+        channel.publish(**detection_fields(detected_texts_2d))
+    if XML_EXPORT:
+        write_xml(detected_texts_2d)
 
+watcher.close()
+channel.close()
 print("Tracker exited cleanly")
 sys.exit(0)
@@ -1,15 +1,24 @@
 import subprocess
 import sys
+import ast
 import tkinter as tk
 from tkinter import ttk
-from multiprocessing import Process, Pipe, shared_memory
+from multiprocessing import Process, Pipe
 import numpy as np
 from PIL import Image, ImageTk
 import cv2
 import yaml
 import os
 import logging
-from processing.captureCamera import main as camera_main
+import threading
+import time
+from processing.captureCamera import main as camera_main, FrameRing
+from processing.connectFour import (
+    ROW_COUNT, COLUMN_COUNT, EMPTY, PLAYER, COMPUTER,
+    Position, TranspositionTable, analyze_moves, win_probability, check_win,
+)
+from processing.stateChannel import StateChannel, ChannelClosed, GAME_CHANNEL, GAME_DTYPE, game_state_dict
+from processing.fileWatch import FileWatcher, atomic_write_image
 from tkinter import messagebox
 import xml.etree.ElementTree as ET
 
@@ -30,11 +39,18 @@ CROP_SAVE_PATH = os.path.join(DATA_DIR, CROP_FILENAME)
 PROCESSING_DIR = os.path.join(BASE_DIR, "processing")
 GAME_STATUS_PATH = os.path.join(PROCESSING_DIR, "game_status.xml")
 
-ROW_COUNT = 6
-COLUMN_COUNT = 7
-EMPTY = 0
-PLAYER = 1  # Computer and 'X'
-COMPUTER = 2  # Player and 'O'
+GAME_STATE_RETRY_S = 1.0  # How often to look for a game while none is running
+ANALYSIS_TIME_MS = 300  # Engine time for the move hints of each new board
+ANALYSIS_TABLE_MB = 16
+WIN_BAR_WIDTH = 300
+WIN_BAR_HEIGHT = 16
+CELL_SIZE = 56  # Pixels per board cell on the game canvas
+CELL_PADDING = 5
+HINT_HEIGHT = 22  # Row under the board for the move hints
+DROP_ANIMATION_MS = 250
+DROP_FRAME_MS = 20
+BOARD_COLOR = "#1f4e9c"
+PIECE_COLORS = {EMPTY: "white", PLAYER: "red", COMPUTER: "yellow"}
 
 logging.basicConfig(
     level=logging.INFO,
@@ -130,7 +146,7 @@ def read_xml():
 
         # Extract the board state as a string
         board_state_str = root.find("board_state").text
-        board_state = eval(board_state_str)
+        board_state = ast.literal_eval(board_state_str)
 
         return board_state
     except Exception as e:
@@ -146,7 +162,7 @@ class CameraInterface:
         self.root = root
         self.root.title("Camera Controller")
 
-        self.board = [[0 for _ in range(7)] for _ in range(6)]
+        self.board = [[EMPTY for _ in range(COLUMN_COUNT)] for _ in range(ROW_COUNT)]
 
         self._init_tabs()
         self._init_camera_state()
@@ -157,6 +173,7 @@ class CameraInterface:
         self._init_game_tab()
 
         self.last_cropped_frame = None
+        self.saved_cropped_frame = None
         os.makedirs(DATA_DIR, exist_ok=True)
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -185,10 +202,11 @@ class CameraInterface:
         self.camera_pipe = None
         self.camera_running = False
 
-        self.output_shared_memory = None
         self.input_shared_memory = None
 
-        self.camera_frame_buffer = None
+        self.frame_ring = None
+        self.preview_frame_number = 0  # Latest camera frame shown by each preview
+        self.crop_frame_number = 0
         self.snapshot_frame = None
 
         self.quad_points = []
@@ -259,15 +277,13 @@ class CameraInterface:
         self.status_label.config(text="Camera: STOPPED", bg="red")
         self.shm_label.config(text="Shared Memory: -")
 
-        if self.output_shared_memory:
+        if self.frame_ring:
             try:
-                self.output_shared_memory.close()
-                self.output_shared_memory.unlink()
+                self.frame_ring.close(unlink=True)
             except FileNotFoundError:
                 pass
 
-        self.output_shared_memory = None
-        self.camera_frame_buffer = None
+        self.frame_ring = None
 
     def _check_camera_ready(self):
         if not self.camera_pipe or not self.camera_running:
@@ -282,12 +298,8 @@ class CameraInterface:
                     self.stop_camera()
                     return
 
-                self.output_shared_memory = shared_memory.SharedMemory(name=shm_name)
-                self.camera_frame_buffer = np.ndarray(
-                    (FRAME_HEIGHT, FRAME_WIDTH, COLOR_CHANNELS),
-                    dtype=np.uint8,
-                    buffer=self.output_shared_memory.buf
-                )
+                self.frame_ring = FrameRing(shm_name)
+                self.preview_frame_number = self.crop_frame_number = 0
 
                 self.status_label.config(text="Camera: RUNNING", bg="green")
                 self.shm_label.config(text=f"Shared Memory: {shm_name}")
@@ -304,10 +316,19 @@ class CameraInterface:
 
 
     def _update_preview(self):
-        if not self.camera_running or self.camera_frame_buffer is None:
+        if not self.camera_running or self.frame_ring is None:
+            return
+
+        # Converts the latest frame in place in its ring slot, skipped until a new frame arrives
+        latest = self.frame_ring.read_latest(
+            lambda slot: cv2.cvtColor(slot, cv2.COLOR_BGR2RGB),
+            newer_than=self.preview_frame_number
+        )
+        if latest is None:
+            self.root.after(int(1000 / FRAMES_PER_SECOND), self._update_preview)
             return
 
-        frame = cv2.cvtColor(self.camera_frame_buffer, cv2.COLOR_BGR2RGB)
+        self.preview_frame_number, frame = latest
         image = ImageTk.PhotoImage(Image.fromarray(frame))
 
         if self.preview_image_id is None:
@@ -350,11 +371,12 @@ class CameraInterface:
         ).pack(pady=5)
 
     def take_snapshot(self):
-        if self.camera_frame_buffer is None:
+        latest = self.frame_ring.read_latest() if self.frame_ring is not None else None
+        if latest is None:
             logging.warning("No frame available for snapshot")
             return
 
-        self.snapshot_frame = self.camera_frame_buffer.copy()
+        self.snapshot_frame = latest[1]
         self.quad_points.clear()
 
         for line in self.quad_lines:
@@ -385,7 +407,13 @@ class CameraInterface:
             logging.warning("Exactly 4 points are required")
             return
 
-        config = {
+        try:
+            with open(CONFIG_PATH, "r") as f:
+                config = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            config = {}
+
+        config.update({
             "points": [
                 {
                     "x": x / (FRAME_WIDTH - 1),
@@ -393,7 +421,7 @@ class CameraInterface:
                 }
                 for x, y in self.quad_points
             ]
-        }
+        })  # Keep the other settings, e.g. the board size
 
         with open(CONFIG_PATH, "w") as f:
             yaml.dump(config, f)
@@ -443,7 +471,7 @@ class CameraInterface:
         if not self.camera_running:
             return
 
-        if self.camera_frame_buffer is None:
+        if self.frame_ring is None:
             return
 
         if not hasattr(self, "crop_points") or self.crop_points is None:
@@ -451,15 +479,21 @@ class CameraInterface:
 
         ordered_points = order_quad_points(self.crop_points)
 
-        cropped = crop_to_black_frame(
-            self.camera_frame_buffer,
-            ordered_points
+        # Crops straight from the ring slot, crop_to_black_frame returns a new array
+        latest = self.frame_ring.read_latest(
+            lambda slot: crop_to_black_frame(slot, ordered_points),
+            newer_than=self.crop_frame_number
         )
+        if latest is None:
+            self.root.after(int(1000 / FRAMES_PER_SECOND), self._update_crop_preview)
+            return
+
+        self.crop_frame_number, cropped = latest
 
         if cropped is None or cropped.size == 0:
             return
 
-        self.last_cropped_frame = cropped.copy()
+        self.last_cropped_frame = cropped
 
         rgb = cv2.cvtColor(cropped, cv2.COLOR_BGR2RGB)
         image = ImageTk.PhotoImage(Image.fromarray(rgb))
@@ -479,9 +513,11 @@ class CameraInterface:
         )
 
     def _save_cropped_frame_periodically(self):
-        if self.last_cropped_frame is not None:
+        # Replace crop.png atomically and only with a new frame, detection wakes on every replacement
+        if self.last_cropped_frame is not None and self.last_cropped_frame is not self.saved_cropped_frame:
             try:
-                cv2.imwrite(CROP_SAVE_PATH, self.last_cropped_frame)
+                atomic_write_image(CROP_SAVE_PATH, self.last_cropped_frame)
+                self.saved_cropped_frame = self.last_cropped_frame
             except Exception:
                 logging.exception("Failed to save cropped frame")
 
@@ -627,33 +663,206 @@ class CameraInterface:
     # TODO Debug and Test
     # --------------------------------------------------------------
     def _init_game_tab(self):
-        # Create a 7x6 grid of labels (for the Connect Four board)
-        self.grid_labels = []
-        for row in range(6):
-            row_labels = []
-            for col in range(7):
-                label = tk.Label(self.game_tab, width=6, height=3, relief="solid", bg="white")
-                label.grid(row=row, column=col, padx=2, pady=2)
-                row_labels.append(label)
-            self.grid_labels.append(row_labels)
+        self.board_canvas = None
+        self.win_bar = None
+        self._build_board_grid(ROW_COUNT, COLUMN_COUNT)
+
+        self.analysis_table = TranspositionTable(ANALYSIS_TABLE_MB)
+        self.analysis_thread = None
+        self.analysis = None  # (board key, side to move, {column: score})
 
-        self.update_board()
+        # The watcher thread stores each new board and wakes the Tk loop with an event
+        self.board_state = None  # Top row first
+        self.game_tab_closing = threading.Event()
+        self.root.bind("<<GameStateChanged>>", self.update_board)
+        threading.Thread(target=self._watch_game_state, daemon=True).start()
+
+    def _notify_game_tab(self):
+        try:
+            self.root.event_generate("<<GameStateChanged>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            self.game_tab_closing.set()  # The window is gone
+
+    def _watch_game_state(self):
+        xml_watcher = FileWatcher([GAME_STATUS_PATH])
+        xml_changed = True
+        while not self.game_tab_closing.is_set():
+            channel = StateChannel.open(GAME_CHANNEL, GAME_DTYPE)
+            if channel is None:
+                # No game running, show the XML export if a game writes one
+                board_state = read_xml() if xml_changed and os.path.exists(GAME_STATUS_PATH) else []
+                if board_state and board_state != self.board_state:
+                    self.board_state = board_state
+                    self._notify_game_tab()
+                xml_changed = bool(xml_watcher.wait(GAME_STATE_RETRY_S))  # Times out to look for a channel again
+                continue
+            xml_changed = True
+            subscription = channel.subscribe()
+            try:
+                while not self.game_tab_closing.is_set():
+                    change = subscription.wait(GAME_STATE_RETRY_S)
+                    if change is not None:
+                        self.board_state = game_state_dict(change[1])["board_state"][::-1]
+                        self._notify_game_tab()
+            except ChannelClosed:
+                pass  # The game ended, wait for the next one
+            finally:
+                subscription.close()
+                channel.close()
+        xml_watcher.close()
+
+    def _build_board_grid(self, rows, cols):
+        # One canvas with an item per cell, hint and the falling piece; updates only change item options
+        if self.board_canvas is not None:
+            self._finish_drop()  # Cancels a pending animation frame on the old canvas
+            self.board_canvas.destroy()
+        if self.win_bar is not None:
+            self.win_bar.destroy()
+        self.board_canvas = tk.Canvas(
+            self.game_tab,
+            width=cols * CELL_SIZE,
+            height=rows * CELL_SIZE + HINT_HEIGHT,
+            highlightthickness=0,
+        )
+        self.board_canvas.pack(pady=10)
+        self.board_canvas.create_rectangle(0, 0, cols * CELL_SIZE, rows * CELL_SIZE, fill=BOARD_COLOR, width=0)
+        self.cell_items = [
+            [self.board_canvas.create_oval(*self._cell_box(row, col), fill=PIECE_COLORS[EMPTY], width=0)
+             for col in range(cols)]
+            for row in range(rows)
+        ]
+        self.drop_item = self.board_canvas.create_oval(0, 0, 0, 0, width=0, state="hidden")
+        self.hint_items = [
+            self.board_canvas.create_text((col + 0.5) * CELL_SIZE, rows * CELL_SIZE + HINT_HEIGHT / 2, text="")
+            for col in range(cols)
+        ]
+        self.shown_board = [[EMPTY] * cols for _ in range(rows)]  # What the canvas shows, top row first
+        self.shown_hints = [("", "black")] * cols
+        self.drop = None  # (row, col, piece, start time) of the animated piece
+        self.drop_after_id = None
+
+        # Win probability bar below the board, red for the player and yellow for the computer
+        self.win_bar = tk.Canvas(self.game_tab, width=WIN_BAR_WIDTH, height=WIN_BAR_HEIGHT, bg="white")
+        self.win_bar.pack(pady=5)
+        self.win_bar_items = (
+            self.win_bar.create_rectangle(0, 0, 0, WIN_BAR_HEIGHT, fill="red", width=0),
+            self.win_bar.create_rectangle(0, 0, 0, WIN_BAR_HEIGHT, fill="yellow", width=0),
+        )
 
-    def update_board(self):
-        board_state = read_xml()
+    @staticmethod
+    def _cell_box(row, col, y_offset=0):
+        x, y = col * CELL_SIZE, row * CELL_SIZE + y_offset
+        return x + CELL_PADDING, y + CELL_PADDING, x + CELL_SIZE - CELL_PADDING, y + CELL_SIZE - CELL_PADDING
+
+    def update_board(self, event=None):
+        board_state = self.board_state
 
         if board_state:
-            for row in range(6):
-                for col in range(7):
-                    cell_value = board_state[row][col]
-                    if cell_value == 1:
-                        self.grid_labels[row][col].config(bg="red")  # Player's piece
-                    elif cell_value == 2:
-                        self.grid_labels[row][col].config(bg="yellow")  # Computer's piece
-                    else:
-                        self.grid_labels[row][col].config(bg="white")  # Empty cell
-
-        self.root.after(1000, self.update_board)
+            rows, cols = len(board_state), len(board_state[0])
+            if rows != len(self.shown_board) or cols != len(self.shown_board[0]):
+                self._build_board_grid(rows, cols)  # The game runs on another board size
+            changed = [
+                (row, col, board_state[row][col])
+                for row in range(rows)
+                for col in range(cols)
+                if board_state[row][col] != self.shown_board[row][col]
+            ]
+            if changed:
+                self._finish_drop()
+                if len(changed) == 1 and changed[0][2] != EMPTY:
+                    self._start_drop(*changed[0])  # A single new piece, the usual move
+                else:
+                    for row, col, piece in changed:  # New game or several moves at once
+                        self.board_canvas.itemconfig(self.cell_items[row][col], fill=PIECE_COLORS.get(piece, "white"))
+                        self.shown_board[row][col] = piece
+            self._update_analysis(board_state)
+
+    def _start_drop(self, row, col, piece):
+        self.shown_board[row][col] = piece
+        self.drop = (row, col, piece, time.perf_counter())
+        self.board_canvas.itemconfig(self.drop_item, fill=PIECE_COLORS.get(piece, "white"), state="normal")
+        self.board_canvas.coords(self.drop_item, *self._cell_box(0, col, -CELL_SIZE))
+        self._animate_drop()
+
+    def _animate_drop(self):
+        row, col, _, start = self.drop
+        progress = (time.perf_counter() - start) * 1000 / DROP_ANIMATION_MS
+        if progress >= 1:
+            self._finish_drop()
+            return
+        # Falls from above the top row with constant acceleration
+        self.board_canvas.coords(self.drop_item, *self._cell_box(0, col, ((row + 1) * progress * progress - 1) * CELL_SIZE))
+        self.drop_after_id = self.root.after(DROP_FRAME_MS, self._animate_drop)
+
+    def _finish_drop(self):
+        if self.drop is None:
+            return
+        row, col, piece, _ = self.drop
+        if self.drop_after_id is not None:
+            self.root.after_cancel(self.drop_after_id)
+            self.drop_after_id = None
+        self.board_canvas.itemconfig(self.drop_item, state="hidden")
+        self.board_canvas.itemconfig(self.cell_items[row][col], fill=PIECE_COLORS.get(piece, "white"))
+        self.drop = None
+
+    # --------------------------------------------------------------
+    # Move hints
+    # --------------------------------------------------------------
+    def _update_analysis(self, board_state):
+        key = str(board_state)
+        if self.analysis is not None and self.analysis[0] == key:
+            self._show_analysis(*self.analysis[1:])
+            return
+        self._show_analysis(None, {})
+        if self.analysis_thread is not None and self.analysis_thread.is_alive():
+            return  # Started when the running analysis reports back
+        self.analysis_thread = threading.Thread(target=self._analyze_board, args=(key, board_state), daemon=True)
+        self.analysis_thread.start()
+
+    def _analyze_board(self, key, board_state):
+        board = np.array(board_state, dtype=int)[::-1]  # The XML lists the top row first
+        position = Position.from_array(board)
+        if check_win(position, PLAYER) or check_win(position, COMPUTER) or position.is_full():
+            self._report_analysis((key, None, {}))
+            return
+        # The engine analyzes for the computer, so the player's turn is analyzed with swapped pieces
+        mover = PLAYER if np.count_nonzero(board == PLAYER) == np.count_nonzero(board == COMPUTER) else COMPUTER
+        if mover == PLAYER:
+            position = Position.from_array(np.select([board == PLAYER, board == COMPUTER], [COMPUTER, PLAYER], EMPTY))
+        try:
+            scores = analyze_moves(position, time_budget_ms=ANALYSIS_TIME_MS, table=self.analysis_table)
+        except Exception:
+            logging.exception("Move analysis failed")
+            scores = {}
+        self._report_analysis((key, mover, scores))
+
+    def _report_analysis(self, analysis):
+        self.analysis = analysis
+        # Marks the analysis done before the event, so update_board can start one for a board that came in meanwhile
+        if self.analysis_thread is threading.current_thread():
+            self.analysis_thread = None
+        self._notify_game_tab()  # update_board shows it, or analyzes the newer board
+
+    def _show_analysis(self, mover, scores):
+        best = max(scores.values()) if scores else None
+        for col, item in enumerate(self.hint_items):
+            hint = ("", "black") if col not in scores else (
+                f"{100 * win_probability(scores[col]):.0f}%",
+                "green" if scores[col] == best else "black",
+            )
+            if hint != self.shown_hints[col]:
+                self.board_canvas.itemconfig(item, text=hint[0], fill=hint[1])
+                self.shown_hints[col] = hint
+
+        if best is None:
+            split = None
+        else:
+            # Red is the player's share, yellow the computer's, as on the board
+            player_share = win_probability(best) if mover == PLAYER else 1 - win_probability(best)
+            split = int(WIN_BAR_WIDTH * player_share)
+        player_bar, computer_bar = self.win_bar_items
+        self.win_bar.coords(player_bar, 0, 0, split or 0, WIN_BAR_HEIGHT)
+        self.win_bar.coords(computer_bar, WIN_BAR_WIDTH if split is None else split, 0, WIN_BAR_WIDTH, WIN_BAR_HEIGHT)
 
     # --------------------------------------------------------------
     # Quadrilateral interaction
@@ -706,6 +915,7 @@ class CameraInterface:
     # --------------------------------------------------------------
     def on_close(self):
         logging.info("Shutting down UI")
+        self.game_tab_closing.set()
         self.stop_detection()
         self.stop_tracker()
         self.stop_camera()